@@ -0,0 +1,72 @@
+# --- START OF FILE activity_io.py ---
+
+import os
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import db_supabase as db
+from activity_store import STATUS_MAPPING, ACTIVITY_TYPES
+
+# --- KONFIGURASI IMPOR & EKSPOR ---
+IMPORT_COLUMNS = ['prospect_name', 'prospect_location', 'contact_person', 'contact_position', 'contact_phone', 'contact_email', 'activity_date', 'activity_type', 'description', 'status']
+EXPORT_PAGE_SIZE = 1000 # Sama dengan batas baris default PostgREST per permintaan
+EXPORT_FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/vnd.apache.parquet")}
+_STATUS_LOOKUP = {**{k: k for k in STATUS_MAPPING}, **{v.lower(): k for k, v in STATUS_MAPPING.items()}}
+
+# --- IMPOR CSV ---
+def parse_activity_csv(file, marketer_id, marketer_username):
+    # Mengembalikan (baris valid siap insert, daftar (nomor baris CSV, pesan error)); nomor baris menghitung header
+    try: df = pd.read_csv(file, dtype=str, keep_default_na=False)
+    except Exception as e: return [], [(0, f"File CSV tidak dapat dibaca: {e}")]
+    df.columns = [col.strip() for col in df.columns]
+    missing = [col for col in ('prospect_name', 'activity_date') if col not in df.columns]
+    if missing: return [], [(1, f"Kolom wajib tidak ada: {', '.join(missing)}")]
+    for col in IMPORT_COLUMNS:
+        df[col] = df[col].str.strip() if col in df.columns else ""
+
+    activity_dates = pd.to_datetime(df['activity_date'], format='%Y-%m-%d', errors='coerce')
+    statuses = df['status'].str.lower().replace("", "baru").map(_STATUS_LOOKUP)
+    activity_types = df['activity_type'].replace("", ACTIVITY_TYPES[0])
+    checks = [(df['prospect_name'] == "", "Nama prospek wajib diisi"),
+              (activity_dates.isna(), "Tanggal aktivitas harus berformat YYYY-MM-DD"),
+              (~activity_types.isin(ACTIVITY_TYPES), f"Jenis aktivitas harus salah satu dari: {', '.join(ACTIVITY_TYPES)}"),
+              (statuses.isna(), f"Status harus salah satu dari: {', '.join(STATUS_MAPPING.values())}")]
+    errors = sorted((index + 2, message) for mask, message in checks for index in df.index[mask])
+
+    valid = ~pd.concat([mask for mask, _ in checks], axis=1).any(axis=1)
+    records = df.loc[valid, IMPORT_COLUMNS].assign(activity_date=activity_dates[valid].dt.strftime('%Y-%m-%d'), activity_type=activity_types[valid], status=statuses[valid],
+                                                   marketer_id=marketer_id, marketer_username=marketer_username)
+    return records.to_dict('records'), errors
+
+# --- EKSPOR (PER HALAMAN) ---
+def _iter_activity_pages(role, user_id, filters=None):
+    cursor = None
+    while True:
+        rows, cursor = db.get_marketing_activities_page(role, user_id, cursor, EXPORT_PAGE_SIZE, filters=filters)
+        if rows: yield pd.DataFrame(rows)
+        if cursor is None: return
+
+def _arrow_schema(df):
+    # Kolom yang seluruhnya kosong di halaman pertama diperlakukan sebagai teks agar halaman berikutnya tetap cocok
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    return pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in schema])
+
+def export_activities(role, user_id, fmt="CSV", filters=None):
+    # Ditulis halaman demi halaman ke file sementara; hanya satu halaman yang berada di memori selama penyusunan.
+    # Mengembalikan (path, jumlah baris); pemanggil wajib menghapus file setelah dipakai
+    suffix, _ = EXPORT_FORMATS[fmt]
+    fd, path = tempfile.mkstemp(prefix="emi_aktivitas_", suffix=f".{suffix}"); os.close(fd)
+    total, writer = 0, None
+    try:
+        for df in _iter_activity_pages(role, user_id, filters):
+            if fmt == "CSV": df.to_csv(path, mode="a", header=total == 0, index=False)
+            else:
+                if writer is None: writer = pq.ParquetWriter(path, _arrow_schema(df))
+                writer.write_table(pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False))
+            total += len(df)
+    except Exception:
+        os.remove(path); raise
+    finally:
+        if writer is not None: writer.close()
+    return path, total
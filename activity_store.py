@@ -0,0 +1,144 @@
+# --- START OF FILE activity_store.py ---
+
+import threading
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+import db_supabase as db
+
+# --- MAPPING & KONSTANTA ---
+STATUS_MAPPING = {'baru': 'Baru', 'dalam_proses': 'Dalam Proses', 'berhasil': 'Berhasil', 'gagal': 'Gagal'}
+ACTIVITY_TYPES = ["Presentasi", "Demo Produk", "Follow-up Call", "Email", "Meeting", "Lainnya"]
+WIB = "Asia/Jakarta"
+
+# --- KONFIGURASI SINKRONISASI ---
+SYNC_INTERVAL_SECONDS = 300 # Jeda maksimum sebelum mengambil delta baru (menangkap perubahan dari proses lain)
+FULL_RECONCILE_SECONDS = 1800 # Muat ulang penuh berkala untuk menangkap baris yang dihapus
+# created_at/updated_at = now() = awal transaksi, jadi baris yang di-commit setelah sinkronisasi bisa bertanggal sebelum watermark.
+# Delta diminta mulai watermark dikurangi jeda ini; baris yang terambil ulang disaring berdasarkan id
+SYNC_OVERLAP_SECONDS = 60
+TIMESTAMP_COLUMNS = ['created_at', 'updated_at']
+
+INDEXED_COLUMNS = {"marketer": 'marketer_id', "manager": 'marketer_manager_id', "prospect": 'prospect_name'}
+EMPTY_POSITIONS = np.array([], dtype=np.intp)
+REFRESH_THREAD_NAME = "activity-store-refresh"
+
+# --- NORMALISASI FRAME ---
+def _categorize(df):
+    # Kategori tetap dari konstanta, ditambah nilai lain yang muncul di data agar tidak menjadi NaN
+    for col, known in (('status', list(STATUS_MAPPING)), ('activity_type', ACTIVITY_TYPES)):
+        extra = sorted(set(df[col].dropna().astype(str)) - set(known))
+        df[col] = pd.Categorical(df[col], categories=known + extra)
+    df['status_label'] = df['status'].cat.rename_categories(STATUS_MAPPING)
+    return df
+
+def normalize_activities(rows):
+    # Baris mentah Supabase -> frame bertipe dengan kolom tampilan siap pakai (tanpa .apply per baris)
+    df = pd.DataFrame(rows)
+    for col in ['id', 'status', 'activity_type', 'activity_date'] + TIMESTAMP_COLUMNS:
+        if col not in df.columns: df[col] = None
+    # ISO8601: Postgres menghilangkan pecahan detik bila mikrodetiknya 0, jadi format tidak boleh ditebak dari baris pertama
+    for col in TIMESTAMP_COLUMNS: df[col] = pd.to_datetime(df[col], utc=True, errors='coerce', format='ISO8601')
+    df['activity_date'] = pd.to_datetime(df['activity_date'], format='%Y-%m-%d', errors='coerce')
+    df['created_at_wib'] = df['created_at'].dt.tz_convert(WIB)
+    df['created_at_display'] = df['created_at_wib'].dt.strftime('%d %b %Y, %H:%M').fillna('N/A')
+    df['activity_date_display'] = df['activity_date'].dt.strftime('%Y-%m-%d').fillna('')
+    return _categorize(df)
+
+def _watermark(df):
+    if df.empty: return None
+    latest = df[TIMESTAMP_COLUMNS].max().max()
+    return None if pd.isna(latest) else latest.isoformat()
+
+def _delta_since(watermark):
+    return None if watermark is None else (pd.Timestamp(watermark) - pd.Timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+
+def _merge(df, delta):
+    # Baris delta menggantikan baris lama dengan id yang sama, lalu diurutkan seperti query asli
+    if delta.empty: return df
+    if df.empty: return delta
+    merged = pd.concat([df[~df['id'].isin(delta['id'])], delta], ignore_index=True)
+    return _categorize(merged.sort_values(['created_at', 'id'], ascending=False, ignore_index=True))
+
+# --- STORE BERSAMA PER PROSES ---
+@st.cache_resource
+def _shared_store():
+    # Satu salinan aktivitas & follow-up untuk semua sesi di proses ini; tampilan per role adalah irisan indeks
+    return {"lock": threading.Lock(), "snapshot": None, "data_version": None, "synced_at": 0.0, "reconciled_at": 0.0, "refresh": None}
+
+def _build_indexes(activities):
+    # Indeks hash: marketer/manajer tim/nama prospek -> array posisi baris (urut seperti frame)
+    indexes = {}
+    for name, col in INDEXED_COLUMNS.items(): indexes[name] = activities.groupby(col, sort=False).indices if col in activities.columns and not activities.empty else {}
+    return indexes
+
+def _group_followups(grouped, followups):
+    # activity_id -> daftar follow-up (urut created_at); follow-up hanya pernah ditambah, jadi delta cukup ditempelkan
+    grouped = dict(grouped)
+    for fu in followups:
+        key = str(fu.get('activity_id')); existing = grouped.get(key, [])
+        if not any(item.get('id') == fu.get('id') for item in existing): grouped[key] = existing + [fu]
+    return grouped
+
+def _followups_watermark(previous, followups):
+    stamps = pd.to_datetime(pd.Series([fu.get('created_at') for fu in followups], dtype=object), utc=True, errors='coerce', format='ISO8601')
+    latest = stamps.max() if not stamps.empty else pd.NaT
+    if pd.isna(latest): return previous
+    return latest.isoformat() if previous is None or latest > pd.Timestamp(previous) else previous
+
+def _refresh(store, data_version):
+    # Berjalan di thread latar (satu per proses): I/O jaringan di luar lock, lalu snapshot baru dipasang secara utuh.
+    # Pembaca yang memegang snapshot lama tidak terpengaruh
+    try:
+        now = time.monotonic(); snapshot = store["snapshot"]
+        if snapshot is None or now - store["reconciled_at"] >= FULL_RECONCILE_SECONDS:
+            activity_rows, followups = db.get_all_marketing_activities_with_manager(columns=db.STORE_COLUMNS), db.get_all_followups()
+            activities = normalize_activities(activity_rows); grouped = _group_followups({}, followups)
+            followups_watermark = _followups_watermark(None, followups); reconciled_at = now
+        else:
+            activity_rows = db.get_all_marketing_activities_with_manager(since=_delta_since(snapshot["activities_watermark"]), columns=db.STORE_COLUMNS)
+            followups = db.get_all_followups(since=_delta_since(snapshot["followups_watermark"]))
+            activities = _merge(snapshot["activities"], normalize_activities(activity_rows)); grouped = _group_followups(snapshot["followups"], followups)
+            followups_watermark = _followups_watermark(snapshot["followups_watermark"], followups); reconciled_at = store["reconciled_at"]
+        snapshot = {"activities": activities, "indexes": _build_indexes(activities), "followups": grouped,
+                    "activities_watermark": _watermark(activities), "followups_watermark": followups_watermark}
+        with store["lock"]: store.update(snapshot=snapshot, data_version=data_version, synced_at=now, reconciled_at=reconciled_at)
+    finally:
+        with store["lock"]: store["refresh"] = None
+
+def _current_snapshot():
+    # Tidak pernah menunggu jaringan: bila snapshot kedaluwarsa, satu refresh dijalankan di latar dan snapshot lama tetap dipakai.
+    # None = snapshot belum ada atau belum memuat penulisan terbaru di proses ini; pemanggil membaca langsung dari Supabase
+    store = _shared_store(); data_version = db.get_data_version(db.data_scope('superadmin', None), ("marketing_activities", "followups"))
+    with store["lock"]:
+        snapshot = store["snapshot"]; current = snapshot is not None and store["data_version"] == data_version
+        if store["refresh"] is None and (not current or time.monotonic() - store["synced_at"] >= SYNC_INTERVAL_SECONDS):
+            store["refresh"] = threading.Thread(target=_refresh, args=(store, data_version), name=REFRESH_THREAD_NAME, daemon=True)
+            store["refresh"].start()
+    return snapshot if current else None
+
+def wait_for_refresh(timeout=None):
+    # Untuk skrip benchmark: tunggu refresh latar yang sedang berjalan
+    refresh = _shared_store()["refresh"]
+    if refresh is not None: refresh.join(timeout)
+
+def _role_positions(indexes, role, user_id):
+    # None = seluruh store (superadmin)
+    if role == 'superadmin': return None
+    own = indexes["marketer"].get(user_id, EMPTY_POSITIONS)
+    return np.union1d(own, indexes["manager"].get(user_id, EMPTY_POSITIONS)) if role == 'manager' else own
+
+# --- TAMPILAN & PENCARIAN ---
+def get_followups(activity_id):
+    snapshot = _current_snapshot()
+    if snapshot is None: return db.get_followups_by_activity_id(activity_id) # Satu query ber-index per aktivitas
+    return list(snapshot["followups"].get(str(activity_id), []))
+
+def get_prospect_activities(role, user_id, prospect_name):
+    snapshot = _current_snapshot()
+    if snapshot is None: return normalize_activities(db.get_prospect_activities(role, user_id, prospect_name, columns=db.LIST_COLUMNS))
+    indexes = snapshot["indexes"]
+    positions = indexes["prospect"].get(prospect_name, EMPTY_POSITIONS); role_positions = _role_positions(indexes, role, user_id)
+    if role_positions is not None: positions = np.intersect1d(positions, role_positions)
+    return snapshot["activities"].iloc[positions]
@@ -1,25 +1,30 @@
 # --- START OF FILE app_supabase.py (Versi Final Absolut) ---
 
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import db_supabase as db
+import activity_store
+import activity_io
+import perf_monitor
 from zoneinfo import ZoneInfo
 
 # --- KONFIGURASI HALAMAN ---
 st.set_page_config(page_title="EMI Marketing Tracker", page_icon="💼", layout="wide")
 
 # --- MAPPING & KONSTANTA ---
-STATUS_MAPPING = {'baru': 'Baru', 'dalam_proses': 'Dalam Proses', 'berhasil': 'Berhasil', 'gagal': 'Gagal'}
+from activity_store import STATUS_MAPPING, ACTIVITY_TYPES
 REVERSE_STATUS_MAPPING = {v: k for k, v in STATUS_MAPPING.items()}
-ACTIVITY_TYPES = ["Presentasi", "Demo Produk", "Follow-up Call", "Email", "Meeting", "Lainnya"]
+WIB_TZ = ZoneInfo(activity_store.WIB)
+PAGE_SIZE_OPTIONS = [25, 50, 100]
+INTEREST_LEVELS = ["Rendah", "Sedang", "Tinggi"]
 
 # --- FUNGSI HELPER ---
-def clear_all_cache(): st.cache_data.clear(); st.cache_resource.clear()
 def convert_to_wib_and_format(iso_string, format_str='%A, %d %b %Y, %H:%M'):
     if not iso_string: return "N/A"
-    try: dt_utc = datetime.fromisoformat(iso_string.replace('Z', '+00:00')); wib_tz = ZoneInfo("Asia/Jakarta"); return dt_utc.astimezone(wib_tz).strftime(format_str)
+    try: dt_utc = datetime.fromisoformat(iso_string.replace('Z', '+00:00')); return dt_utc.astimezone(WIB_TZ).strftime(format_str)
     except: return iso_string
 def date_to_str(dt): return dt.strftime("%Y-%m-%d") if isinstance(dt, (date, datetime)) else dt
 def str_to_date(s):
@@ -50,62 +55,68 @@ def show_sidebar():
         pages = ["Dashboard", "Aktivitas Pemasaran"] # Menu Riset Prospek disembunyikan
         if profile.get('role') in ['superadmin', 'manager']: pages.append("Manajemen Pengguna")
         page = st.radio("Pilih Halaman:", pages, key="page_selection"); st.divider()
-        if st.button("Logout"): clear_all_cache(); st.session_state.clear(); st.rerun()
+        if st.button("Logout"): st.session_state.clear(); st.rerun()
         return page
 
-@st.cache_data(ttl=300)
-def get_data_based_on_role():
-    user = st.session_state.user
-    profile = st.session_state.profile
-    role = profile.get('role')
-
-    if role == 'superadmin':
-        activities = db.get_all_marketing_activities()
-        profiles = db.get_all_profiles()
-        # Untuk konsistensi, kita kembalikan 3 nilai, meskipun satu mungkin kosong
-        prospects = [] # Asumsi riset prospek tidak dipakai
-        return activities, prospects, profiles
-        
-    elif role == 'manager':
-        activities = db.get_team_marketing_activities(user.id)
-        profiles = db.get_team_profiles(user.id)
-        prospects = [] # Asumsi riset prospek tidak dipakai
-        return activities, prospects, profiles
-        
-    else: # marketing
-        activities = db.get_marketing_activities_by_user_id(user.id)
-        profiles = [profile] # Hanya profil diri sendiri
-        prospects = [] # Asumsi riset prospek tidak dipakai
-        return activities, prospects, profiles
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_role_profiles(user_id, role, data_version):
+    # data_version ikut menjadi kunci cache: penulisan data hanya membatalkan cache cakupan yang terdampak
+    if role == 'superadmin': return db.get_all_profiles()
+    elif role == 'manager': return db.get_team_profiles(user_id)
+    else: return None # marketing
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_activity_page(user_id, role, cursor, page_size, filters, data_version):
+    # Dinormalisasi sekali per versi data; rerun berikutnya memakai frame dari cache
+    page_activities, next_cursor = db.get_marketing_activities_page(role, user_id, cursor, page_size, columns=db.LIST_COLUMNS, filters=filters)
+    return activity_store.normalize_activities(page_activities), next_cursor
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_activity_summary(user_id, role, data_version):
+    return db.get_activity_summary(role, user_id)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_upcoming_followups(user_id, role, start_date, end_date, data_version):
+    return db.get_upcoming_followups(role, user_id, start_date, end_date)
+
+def current_data_version(tables=db.DATA_TABLES):
+    return db.get_data_version(db.data_scope(st.session_state.profile.get('role'), st.session_state.user.id), tables)
+
+def reset_activity_pages(): st.session_state.activity_page_cursors = [None]
 
 # --- FUNGSI UNTUK SETIAP HALAMAN ---
+@perf_monitor.timed_page
 def page_dashboard():
     st.title(f"Dashboard {st.session_state.profile.get('role', '').capitalize()}")
-    activities, _, _ = get_data_based_on_role()
+    user = st.session_state.user; role = st.session_state.profile.get('role')
+    # Ringkasan, aktivitas terbaru, dan jadwal follow-up saling independen: diambil paralel dalam satu latensi jaringan
+    activities_version = current_data_version(("marketing_activities",)); followups_version = current_data_version(("marketing_activities", "followups")); wib_today = datetime.now(WIB_TZ).date()
+    summary, (latest_activities, _), upcoming = db.run_concurrently(
+        lambda: _load_activity_summary(user.id, role, activities_version),
+        lambda: _load_activity_page(user.id, role, None, 5, None, activities_version),
+        lambda: _load_upcoming_followups(user.id, role, wib_today, wib_today + timedelta(days=7), followups_version))
 
-    if not activities:
+    if not summary or not summary.get('total_activities'):
         st.info("Belum ada data aktivitas untuk ditampilkan di Dashboard.")
     else:
-        df = pd.DataFrame(activities)
-
-        # Bagian Metrik
+        # Bagian Metrik (dihitung di server oleh fungsi SQL get_activity_summary)
         col1, col2, col3 = st.columns(3)
-        col1.metric("Total Aktivitas", len(df))
-        col2.metric("Total Prospek Unik", df['prospect_name'].nunique() if 'prospect_name' in df.columns else 0)
-        if st.session_state.profile.get('role') in ['superadmin', 'manager']:
-            col3.metric("Jumlah Anggota Tim", df['marketer_id'].nunique() if 'marketer_id' in df.columns else 0)
+        col1.metric("Total Aktivitas", summary['total_activities'])
+        col2.metric("Total Prospek Unik", summary['unique_prospects'])
+        if role in ['superadmin', 'manager']:
+            col3.metric("Jumlah Anggota Tim", summary['unique_marketers'])
 
         # === GRAFIK DIKEMBALIKAN ===
         st.subheader("Analisis Aktivitas Pemasaran")
         col_chart1, col_chart2 = st.columns(2)
         with col_chart1:
-            if 'status' in df.columns and not df['status'].empty:
-                status_counts = df['status'].map(STATUS_MAPPING).value_counts()
+            if summary['by_status']:
+                status_counts = pd.Series(summary['by_status']).rename(index=STATUS_MAPPING).sort_values(ascending=False)
                 fig_pie = px.pie(status_counts, values=status_counts.values, names=status_counts.index, title="Distribusi Status Prospek")
                 st.plotly_chart(fig_pie, use_container_width=True)
         with col_chart2:
-            if 'activity_type' in df.columns and not df['activity_type'].empty:
-                type_counts = df['activity_type'].value_counts()
+            if summary['by_activity_type']:
+                type_counts = pd.Series(summary['by_activity_type']).sort_values(ascending=False)
                 fig_bar = px.bar(type_counts, x=type_counts.index, y=type_counts.values, title="Distribusi Jenis Aktivitas")
                 st.plotly_chart(fig_bar, use_container_width=True)
 
@@ -113,76 +124,157 @@ def page_dashboard():
 
         # === DAFTAR AKTIVITAS TERBARU DIKEMBALIKAN ===
         st.subheader("Aktivitas Terbaru")
-        latest_activities = df.head(5).copy()
-        if 'created_at' in latest_activities.columns:
-            latest_activities['Waktu Dibuat'] = latest_activities['created_at'].apply(lambda x: convert_to_wib_and_format(x, format_str='%d %b %Y, %H:%M'))
-            display_cols = ['Waktu Dibuat', 'prospect_name', 'marketer_username', 'status']
-            if all(col in latest_activities.columns for col in display_cols):
-                latest_display = latest_activities[display_cols].rename(columns={'prospect_name': 'Prospek', 'marketer_username': 'Marketing', 'status': 'Status'})
-                latest_display['Status'] = latest_display['Status'].map(STATUS_MAPPING)
-                st.dataframe(latest_display, use_container_width=True, hide_index=True)
+        if not latest_activities.empty:
+            display_cols = ['created_at_display', 'prospect_name', 'marketer_username', 'status_label']
+            latest_display = latest_activities[display_cols].rename(columns={'created_at_display': 'Waktu Dibuat', 'prospect_name': 'Prospek', 'marketer_username': 'Marketing', 'status_label': 'Status'})
+            st.dataframe(latest_display, use_container_width=True, hide_index=True)
 
         st.divider()
 
         # === JADWAL FOLLOW-UP DIKEMBALIKAN ===
         st.subheader("Jadwal Follow-up (7 Hari Mendatang)")
-        all_followups = [fu for act in activities if act.get('id') for fu in db.get_followups_by_activity_id(act['id'])]
-        if not all_followups:
-            st.info("Tidak ada jadwal follow-up yang ditemukan.")
+        if not upcoming:
+            st.info("Tidak ada jadwal follow-up dalam 7 hari ke depan.")
         else:
-            for fu in all_followups:
-                fu['prospect_name'] = next((act.get('prospect_name', 'N/A') for act in activities if act.get('id') == fu.get('activity_id')), 'N/A')
-            
-            followups_df = pd.DataFrame(all_followups)
-            if 'next_followup_date' in followups_df.columns:
-                followups_df['next_followup_date'] = pd.to_datetime(followups_df['next_followup_date'], utc=True, errors='coerce')
-                followups_df.dropna(subset=['next_followup_date'], inplace=True)
-                
-                if not followups_df.empty:
-                    wib_tz = ZoneInfo("Asia/Jakarta")
-                    today = pd.Timestamp.now(tz=wib_tz).normalize()
-                    next_7_days = today + pd.Timedelta(days=7)
-                    upcoming_df = followups_df[(followups_df['next_followup_date'] >= today) & (followups_df['next_followup_date'] <= next_7_days)].sort_values(by='next_followup_date')
-                    
-                    if not upcoming_df.empty:
-                        upcoming_df['Tanggal'] = upcoming_df['next_followup_date'].dt.tz_convert(wib_tz).dt.strftime('%A, %d %b %Y')
-                        display_cols_fu = ['Tanggal', 'prospect_name', 'marketer_username', 'next_action']
-                        st.dataframe(upcoming_df[display_cols_fu].rename(columns={'prospect_name': 'Prospek', 'marketer_username': 'Marketing', 'next_action': 'Tindakan'}), use_container_width=True, hide_index=True)
-                    else:
-                        st.info("Tidak ada jadwal follow-up dalam 7 hari ke depan.")
-            else:
-                st.warning("Data follow-up tidak memiliki kolom 'next_followup_date'.")
+            upcoming_df = pd.DataFrame(upcoming)
+            upcoming_df['Tanggal'] = pd.to_datetime(upcoming_df['next_followup_date'], errors='coerce').dt.strftime('%A, %d %b %Y')
+            display_cols_fu = ['Tanggal', 'prospect_name', 'marketer_username', 'next_action']
+            st.dataframe(upcoming_df[display_cols_fu].rename(columns={'prospect_name': 'Prospek', 'marketer_username': 'Marketing', 'next_action': 'Tindakan'}), use_container_width=True, hide_index=True)
 
     # Fitur Apollo tetap di-skip untuk sementara
     st.divider()
 
+@perf_monitor.timed_page
 def page_activities_management():
-    st.title("Manajemen Aktivitas Pemasaran"); activities, _ = get_data_based_on_role()
-    valid_activities = [act for act in activities if act and act.get('id')]
-    if not valid_activities:
-        st.info("Belum ada data aktivitas. Silakan tambahkan aktivitas baru."); st.divider()
-        show_activity_form(None)
+    st.title("Manajemen Aktivitas Pemasaran")
+    user = st.session_state.user; role = st.session_state.profile.get('role')
+    show_import_export_section()
+    filters = show_activity_filters(role, user.id)
+    # Cursor awal dari setiap halaman yang sudah dikunjungi; elemen terakhir = halaman aktif
+    if "activity_page_cursors" not in st.session_state: reset_activity_pages()
+    cursors = st.session_state.activity_page_cursors
+    page_size = st.session_state.get("activity_page_size", db.ACTIVITY_PAGE_SIZE)
+    page_activities, next_cursor = _load_activity_page(user.id, role, cursors[-1], page_size, filters, current_data_version(("marketing_activities",)))
+    valid_activities = page_activities[page_activities['id'].notna()]
+    if valid_activities.empty:
+        if len(cursors) > 1: reset_activity_pages(); st.rerun() # Halaman lanjutan kosong (mis. data terhapus), kembali ke awal
+        if filters: st.info("Tidak ada aktivitas yang cocok dengan filter.")
+        else: st.info("Belum ada data aktivitas. Silakan tambahkan aktivitas baru.")
+        st.divider(); show_activity_form(None)
         return
 
-    st.subheader("Semua Catatan Aktivitas")
-    df = pd.DataFrame(valid_activities)
+    st.subheader("Hasil Pencarian Aktivitas" if filters else "Semua Catatan Aktivitas")
     # Menampilkan tabel yang lebih rapi
-    display_cols = ['activity_date', 'prospect_name', 'prospect_location', 'marketer_username', 'activity_type', 'status']
-    df_display = df[display_cols].rename(columns={'activity_date': 'Tanggal', 'prospect_name': 'Prospek', 'prospect_location': 'Lokasi', 'marketer_username': 'Marketing', 'activity_type': 'Jenis', 'status': 'Status'})
-    df_display['Status'] = df_display['Status'].map(STATUS_MAPPING)
+    display_cols = ['activity_date_display', 'prospect_name', 'prospect_location', 'marketer_username', 'activity_type', 'status_label']
+    df_display = valid_activities[display_cols].rename(columns={'activity_date_display': 'Tanggal', 'prospect_name': 'Prospek', 'prospect_location': 'Lokasi', 'marketer_username': 'Marketing', 'activity_type': 'Jenis', 'status_label': 'Status'})
     st.dataframe(df_display, use_container_width=True, hide_index=True)
+    col_prev, col_page, col_next, col_size = st.columns([1, 2, 1, 1])
+    if col_prev.button("⬅️ Sebelumnya", disabled=len(cursors) == 1): cursors.pop(); st.rerun()
+    col_page.write(f"Halaman {len(cursors)}")
+    if col_next.button("Berikutnya ➡️", disabled=next_cursor is None): cursors.append(next_cursor); st.rerun()
+    col_size.selectbox("Baris per halaman", PAGE_SIZE_OPTIONS, index=PAGE_SIZE_OPTIONS.index(db.ACTIVITY_PAGE_SIZE), key="activity_page_size", on_change=reset_activity_pages)
+    show_bulk_followup_section(valid_activities)
     st.divider()
 
-    options = {act['id']: f"{act['prospect_name']} - {act.get('contact_person', 'N/A')}" for act in valid_activities}
+    labels = valid_activities['prospect_name'].astype(str) + " - " + valid_activities['contact_person'].fillna('N/A').astype(str)
+    options = dict(zip(valid_activities['id'].tolist(), labels.tolist()))
     options[0] = "<< Tambah Aktivitas Baru >>"
     selected_id = st.selectbox("Pilih aktivitas untuk detail/edit:", options.keys(), format_func=lambda x: options.get(x), index=0)
     
     if selected_id == 0: show_activity_form(None)
     else:
-        activity = db.get_activity_by_id(selected_id)
+        # Detail lengkap dari Supabase (LRU), riwayat follow-up dari store bersama (lookup indeks)
+        activity, followups = db.run_concurrently(lambda: db.get_activity_by_id(selected_id), lambda: activity_store.get_followups(selected_id))
         if activity:
             show_activity_form(activity)
-            show_followup_section(activity)
+            show_followup_section(activity, followups)
+            show_prospect_history(activity)
+
+def show_activity_filters(role, user_id):
+    # Filter baru dikirim saat tombol ditekan (form), jadi mengetik kata kunci tidak memicu query di setiap rerun
+    filters = st.session_state.get("activity_filters", {})
+    with st.expander("🔍 Cari & Filter Aktivitas", expanded=bool(filters)):
+        with st.form("activity_filter_form"):
+            search = st.text_input("Cari nama prospek, lokasi, atau kontak", value=filters.get("search", ""))
+            col_status, col_type = st.columns(2)
+            statuses = col_status.multiselect("Status", list(STATUS_MAPPING), default=filters.get("statuses", []), format_func=STATUS_MAPPING.get)
+            activity_types = col_type.multiselect("Jenis Aktivitas", ACTIVITY_TYPES, default=filters.get("activity_types", []))
+            col_marketer, col_from, col_to = st.columns(3)
+            marketer_id = None
+            if role in ['superadmin', 'manager']:
+                # Profil tim/semua pengguna dari cache (satu query kecil), bukan dari store aktivitas yang memuat seluruh tabel
+                profiles = _load_role_profiles(user_id, role, current_data_version(("profiles",))) or []
+                marketers = {p['id']: p.get('full_name') for p in profiles if p.get('role') != 'superadmin'}
+                options = [None, *marketers]
+                marketer_id = col_marketer.selectbox("Marketing", options, index=options.index(filters.get("marketer_id")) if filters.get("marketer_id") in options else 0, format_func=lambda x: "Semua" if x is None else marketers.get(x))
+            date_from = col_from.date_input("Dari Tanggal", value=filters.get("date_from"))
+            date_to = col_to.date_input("Sampai Tanggal", value=filters.get("date_to"))
+            col_apply, col_reset = st.columns(2)
+            applied = col_apply.form_submit_button("Terapkan Filter"); cleared = col_reset.form_submit_button("Reset Filter")
+    if applied and date_from and date_to and date_from > date_to: st.warning("Tanggal awal tidak boleh setelah tanggal akhir."); return filters
+    if applied or cleared:
+        new_filters = {} if cleared else {"search": search.strip(), "statuses": statuses, "activity_types": activity_types, "marketer_id": marketer_id, "date_from": date_from, "date_to": date_to}
+        st.session_state.activity_filters = {k: v for k, v in new_filters.items() if v}
+        reset_activity_pages(); st.rerun()
+    return filters
+
+def show_bulk_followup_section(activities):
+    # Follow-up/perubahan status untuk banyak aktivitas di halaman ini sekaligus, disimpan dalam satu RPC transaksional
+    with st.expander("📞 Follow-up Massal (halaman ini)"):
+        editor_df = pd.DataFrame({"Pilih": False, "id": activities['id'].tolist(), "Prospek": activities['prospect_name'].tolist(),
+                                  "Status": activities['status_label'].astype(str).tolist(), "Catatan": "", "Tindak Lanjut": "",
+                                  "Jadwal Berikutnya": None, "Minat": INTEREST_LEVELS[1]})
+        with st.form("bulk_followup_form"):
+            edited = st.data_editor(editor_df, hide_index=True, use_container_width=True, disabled=["id", "Prospek"], column_order=["Pilih", "Prospek", "Status", "Catatan", "Tindak Lanjut", "Jadwal Berikutnya", "Minat"],
+                                    column_config={"Pilih": st.column_config.CheckboxColumn("Pilih"), "Status": st.column_config.SelectboxColumn("Status", options=list(STATUS_MAPPING.values()), required=True),
+                                                   "Jadwal Berikutnya": st.column_config.DateColumn("Jadwal Berikutnya"), "Minat": st.column_config.SelectboxColumn("Minat", options=INTEREST_LEVELS, required=True)})
+            if st.form_submit_button("Simpan Follow-up Terpilih"):
+                selected = edited[edited["Pilih"]]
+                if selected.empty: st.warning("Pilih minimal satu aktivitas.")
+                else:
+                    user = st.session_state.user; full_name = st.session_state.profile.get('full_name')
+                    entries = [{"activity_id": row["id"], "marketer_id": user.id, "marketer_username": full_name, "notes": row["Catatan"] or None, "next_action": row["Tindak Lanjut"],
+                                "next_followup_date": row["Jadwal Berikutnya"] if pd.notna(row["Jadwal Berikutnya"]) else None, "interest_level": row["Minat"], "status_update": REVERSE_STATUS_MAPPING.get(row["Status"])}
+                               for row in selected.to_dict('records')]
+                    success, msg = db.add_followups_bulk(entries)
+                    if success: st.success(msg); st.rerun()
+                    else: st.error(msg)
+
+def show_import_export_section():
+    profile = st.session_state.profile; user = st.session_state.user
+    with st.expander("📥 Impor & Ekspor Aktivitas"):
+        tab_import, tab_export = st.tabs(["Impor CSV", "Ekspor"])
+        with tab_import:
+            st.caption(f"Kolom: {', '.join(activity_io.IMPORT_COLUMNS)}. Wajib: prospect_name dan activity_date (YYYY-MM-DD). Aktivitas dicatat atas nama Anda.")
+            uploaded = st.file_uploader("File CSV", type=["csv"], key=f"activity_import_file_{st.session_state.get('activity_import_nonce', 0)}")
+            if uploaded:
+                rows, errors = activity_io.parse_activity_csv(uploaded, user.id, profile.get('full_name'))
+                st.write(f"**{len(rows)}** baris valid, **{len(errors)}** kesalahan.")
+                if errors: st.dataframe(pd.DataFrame(errors, columns=["Baris", "Kesalahan"]), use_container_width=True, hide_index=True)
+                if rows and st.button(f"Impor {len(rows)} Aktivitas"):
+                    with st.spinner("Mengimpor..."):
+                        inserted, failed_chunks = db.add_marketing_activities_bulk(rows, profile.get('manager_id'))
+                    st.session_state.activity_import_nonce = st.session_state.get('activity_import_nonce', 0) + 1 # Kosongkan uploader agar file tidak terimpor dua kali
+                    if inserted: st.success(f"{inserted} aktivitas berhasil diimpor.")
+                    # Indeks chunk mengacu ke daftar baris valid, bukan nomor baris CSV
+                    for start, end, msg in failed_chunks: st.error(f"Baris valid ke-{start + 1} s.d. {end + 1}: {msg}")
+        with tab_export:
+            filters = st.session_state.get("activity_filters")
+            if filters: st.caption("Ekspor mengikuti filter pencarian yang sedang aktif.")
+            fmt = st.radio("Format", list(activity_io.EXPORT_FORMATS), horizontal=True, key="activity_export_format")
+            if st.button("Siapkan File Ekspor"):
+                with st.spinner("Menyiapkan file..."):
+                    # File sementara hanya dipakai saat menyusun ekspor per halaman, lalu langsung dihapus. Isi unduhan hanya ada
+                    # pada rerun ini (tidak disimpan di session_state); Streamlit memegang satu salinan untuk tombol unduh
+                    path, total = activity_io.export_activities(profile.get('role'), user.id, fmt, filters)
+                    try:
+                        with open(path, "rb") as f: data = f.read()
+                    finally: os.remove(path)
+                if total:
+                    extension, mime = activity_io.EXPORT_FORMATS[fmt]
+                    st.download_button(f"Unduh {total} Aktivitas ({fmt})", data, file_name=f"aktivitas_{date.today():%Y%m%d}.{extension}", mime=mime, on_click="ignore")
+                    st.caption("Tombol unduh hilang setelah interaksi berikutnya; siapkan lagi bila diperlukan.")
+                else: st.info("Tidak ada aktivitas untuk diekspor.")
 
 def show_activity_form(activity):
     profile = st.session_state.profile; user = st.session_state.user; is_edit_mode = activity is not None
@@ -207,35 +299,43 @@ def show_activity_form(activity):
                 with st.spinner("Menyimpan..."):
                     status_key = REVERSE_STATUS_MAPPING.get(status_display)
                     if is_edit_mode:
-                        success, msg = db.edit_marketing_activity(activity['id'], prospect_name, prospect_location, contact_person, contact_position, contact_phone, contact_email, date_to_str(activity_date), activity_type, description, status_key)
+                        success, msg = db.edit_marketing_activity(activity['id'], prospect_name, prospect_location, contact_person, contact_position, contact_phone, contact_email, date_to_str(activity_date), activity_type, description, status_key, activity.get('marketer_manager_id'))
                     else:
-                        success, msg, _ = db.add_marketing_activity(user.id, profile.get('full_name'), prospect_name, prospect_location, contact_person, contact_position, contact_phone, contact_email, date_to_str(activity_date), activity_type, description, status_key)
-                    if success: st.success(msg); clear_all_cache(); st.rerun()
+                        success, msg, _ = db.add_marketing_activity(user.id, profile.get('full_name'), prospect_name, prospect_location, contact_person, contact_position, contact_phone, contact_email, date_to_str(activity_date), activity_type, description, status_key, profile.get('manager_id'))
+                    if success: st.success(msg); st.rerun()
                     else: st.error(f"Gagal: {msg}")
 
-def show_followup_section(activity):
+def show_followup_section(activity, followups):
     st.divider(); st.subheader(f"Riwayat & Tambah Follow-up untuk {activity.get('prospect_name')}")
-    followups = db.get_followups_by_activity_id(activity['id'])
     if followups:
         for fu in reversed(followups): st.markdown(f"**{convert_to_wib_and_format(fu.get('created_at'))}**: {fu.get('notes')}")
     with st.form("new_followup_form", clear_on_submit=True):
         notes = st.text_area("Catatan Follow-up*", key="followup_notes")
         next_action = st.text_input("Tindak Lanjut")
         next_followup_date = st.date_input("Jadwal Berikutnya", value=None)
-        interest_level = st.select_slider("Minat", ["Rendah", "Sedang", "Tinggi"])
+        interest_level = st.select_slider("Minat", INTEREST_LEVELS)
         status_display = st.selectbox("Update Status", list(STATUS_MAPPING.values()))
         if st.form_submit_button("Simpan Follow-up"):
             if notes:
                 success, msg = db.add_followup(activity['id'], st.session_state.user.id, st.session_state.profile.get('full_name'), notes, next_action, next_followup_date, interest_level, REVERSE_STATUS_MAPPING.get(status_display))
-                if success: st.success(msg); clear_all_cache(); st.rerun()
+                if success: st.success(msg); st.rerun()
                 else: st.error(msg)
             else: st.warning("Catatan tidak boleh kosong.")
 
+def show_prospect_history(activity):
+    history = activity_store.get_prospect_activities(st.session_state.profile.get('role'), st.session_state.user.id, activity.get('prospect_name'))
+    history = history[history['id'] != activity['id']]
+    if not history.empty:
+        st.divider(); st.subheader(f"Aktivitas Lain untuk {activity.get('prospect_name')}")
+        display_cols = ['activity_date_display', 'marketer_username', 'activity_type', 'status_label']
+        st.dataframe(history[display_cols].rename(columns={'activity_date_display': 'Tanggal', 'marketer_username': 'Marketing', 'activity_type': 'Jenis', 'status_label': 'Status'}), use_container_width=True, hide_index=True)
+
+@perf_monitor.timed_page
 def page_user_management():
     st.title("Manajemen Pengguna")
     profile = st.session_state.profile; user = st.session_state.user
     if profile.get('role') not in ['superadmin', 'manager']: st.error("Akses ditolak."); return
-    profiles_data = db.get_all_profiles() if profile.get('role') == 'superadmin' else db.get_team_profiles(user.id)
+    profiles_data = _load_role_profiles(user.id, profile.get('role'), current_data_version(("profiles",)))
     tab1, tab2 = st.tabs(["Daftar Pengguna", "Tambah Pengguna Baru"])
     with tab1:
         st.subheader("Daftar Pengguna Saat Ini")
@@ -251,18 +351,28 @@ def page_user_management():
             role_options = ["manager", "marketing"] if profile.get('role') == 'superadmin' else ["marketing"]; role = st.selectbox("Role*", role_options)
             manager_id = None
             if role == 'marketing' and profile.get('role') == 'superadmin':
-                managers = db.get_all_managers(); manager_options = {mgr['id']: mgr['full_name'] for mgr in managers}
+                # Superadmin sudah memuat semua profil di atas (cache), jadi daftar manajer tidak perlu query terpisah
+                managers = [p for p in profiles_data or [] if p.get('role') == 'manager']; manager_options = {mgr['id']: mgr['full_name'] for mgr in managers}
                 if managers: manager_id = st.selectbox("Pilih Manajer*", list(manager_options.keys()), format_func=lambda x: manager_options.get(x))
                 else: st.warning("Belum ada manajer.")
             elif role == 'marketing' and profile.get('role') == 'manager': manager_id = user.id
             if st.form_submit_button("Daftarkan"):
                 if all([full_name, email, password]):
                     _, error = db.create_user_as_admin(email, password, full_name, role, manager_id)
-                    if not error: st.success("Pengguna berhasil didaftarkan."); clear_all_cache()
+                    if not error: st.success("Pengguna berhasil didaftarkan.")
                     else: st.error(f"Gagal: {error}")
                 else: st.error("Field dengan tanda bintang (*) wajib diisi!")
 
+def show_perf_panel():
+    # Panel performa hanya untuk superadmin; log JSONL opsional lewat secrets [perf] log_path
+    summary = perf_monitor.rerun_summary(); profile = st.session_state.get('profile') or {}
+    if not summary: return
+    log_path = st.secrets.get("perf", {}).get("log_path")
+    if log_path: perf_monitor.append_log(summary, log_path, page=st.session_state.get("page_selection"), role=profile.get('role'))
+    if profile.get('role') == 'superadmin': perf_monitor.show_perf_panel(summary)
+
 def main():
+    perf_monitor.start_rerun()
     if "logged_in" not in st.session_state: st.session_state.logged_in = False
     if not st.session_state.get("logged_in"):
         show_login_page()
@@ -275,6 +385,7 @@ def main():
             # Halaman yang tidak digunakan dinonaktifkan dari router utama
             # elif page == "Riset Prospek": page_prospect_research()
             # elif page == "Pengaturan": page_settings()
+        show_perf_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+# --- START OF FILE benchmarks/data_generator.py ---
+# Data sintetis untuk stand-in Supabase: profil dengan hierarki manajer, aktivitas, dan follow-up.
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from activity_store import STATUS_MAPPING, ACTIVITY_TYPES
+
+# nama skala -> (jumlah aktivitas, jumlah manajer, jumlah marketing)
+SCALES = {"1k": (1_000, 4, 20), "10k": (10_000, 10, 100), "100k": (100_000, 30, 500)}
+CITIES = ["Jakarta", "Bandung", "Surabaya", "Medan", "Semarang", "Makassar", "Yogyakarta", "Denpasar", "Palembang", "Balikpapan"]
+COMPANY_PREFIXES = ["PT", "CV", "Koperasi", "Yayasan"]
+COMPANY_WORDS = ["Sinar", "Maju", "Jaya", "Abadi", "Sentosa", "Mandiri", "Nusantara", "Cipta", "Karya", "Makmur", "Sejahtera", "Bintang"]
+FIRST_NAMES = ["Andi", "Budi", "Citra", "Dewi", "Eko", "Fitri", "Gilang", "Hana", "Indra", "Joko", "Kartika", "Lestari", "Made", "Nur", "Oki", "Putri"]
+POSITIONS = ["Direktur", "Manajer Keuangan", "Kepala Divisi", "Staf Pengadaan", "Pemilik"]
+INTEREST_LEVELS = ["Rendah", "Sedang", "Tinggi"]
+
+def _uuid(rng): return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+def _timestamp(dt):
+    # Seperti Postgres: pecahan detik dihilangkan bila mikrodetiknya 0 (sebagian stempel dibulatkan ke detik agar bentuk ini ikut muncul)
+    return (dt.replace(microsecond=0) if dt.microsecond % 10 == 0 else dt).isoformat()
+
+def generate_profiles(rng, manager_count, marketer_count):
+    superadmin = {"id": _uuid(rng), "full_name": "Super Admin", "role": "superadmin", "email": "admin@emi.test", "manager_id": None}
+    managers = [{"id": _uuid(rng), "full_name": f"Manajer {i + 1}", "role": "manager", "email": f"manager{i + 1}@emi.test", "manager_id": None} for i in range(manager_count)]
+    marketers = [{"id": _uuid(rng), "full_name": f"{rng.choice(FIRST_NAMES)} Marketing {i + 1}", "role": "marketing", "email": f"marketing{i + 1}@emi.test", "manager_id": rng.choice(managers)["id"]} for i in range(marketer_count)]
+    return [superadmin] + managers + marketers
+
+def generate_activities(rng, profiles, count, now):
+    # Manajer juga mencatat aktivitas sendiri; jumlah prospek unik sekitar sepertiga jumlah aktivitas
+    marketers = [p for p in profiles if p["role"] in ("manager", "marketing")]
+    prospects = [f"{rng.choice(COMPANY_PREFIXES)} {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {i}" for i in range(max(count // 3, 1))]
+    activities = []
+    for i in range(count):
+        marketer = rng.choice(marketers); created_at = now - timedelta(days=rng.uniform(0, 730))
+        updated_at = created_at + timedelta(days=rng.uniform(0, 30)) if rng.random() < 0.3 else created_at
+        activities.append({"id": i + 1, "created_at": _timestamp(created_at), "updated_at": _timestamp(min(updated_at, now)),
+                           "marketer_id": marketer["id"], "marketer_username": marketer["full_name"],
+                           "prospect_name": rng.choice(prospects), "prospect_location": rng.choice(CITIES),
+                           "contact_person": f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)}", "contact_position": rng.choice(POSITIONS),
+                           "contact_phone": f"08{rng.randrange(10**9, 10**10)}", "contact_email": f"kontak{i + 1}@prospek.test",
+                           "activity_date": (created_at - timedelta(days=rng.randint(0, 3))).date().isoformat(),
+                           "activity_type": rng.choice(ACTIVITY_TYPES), "status": rng.choice(list(STATUS_MAPPING)),
+                           "description": " ".join(rng.choice(COMPANY_WORDS).lower() for _ in range(rng.randint(20, 60)))})
+    return activities
+
+def generate_followups(rng, activities, now, ratio=0.6):
+    followups = []
+    for activity in rng.sample(activities, int(len(activities) * ratio)):
+        created_at = max(datetime.fromisoformat(activity["created_at"]), now - timedelta(days=rng.uniform(0, 60)))
+        followups.append({"id": len(followups) + 1, "created_at": _timestamp(created_at), "activity_id": activity["id"],
+                          "marketer_id": activity["marketer_id"], "marketer_username": activity["marketer_username"],
+                          "notes": "Follow-up " + " ".join(rng.choice(COMPANY_WORDS).lower() for _ in range(rng.randint(5, 20))),
+                          "next_action": rng.choice(["Telepon ulang", "Kirim proposal", "Jadwalkan demo", "Kunjungan"]),
+                          "next_followup_date": (now + timedelta(days=rng.randint(-30, 30))).date().isoformat(),
+                          "interest_level": rng.choice(INTEREST_LEVELS)})
+    return followups
+
+def generate_dataset(scale="1k", seed=42, now=None):
+    activity_count, manager_count, marketer_count = SCALES[scale]
+    rng = random.Random(seed); now = now or datetime.now(timezone.utc)
+    profiles = generate_profiles(rng, manager_count, marketer_count)
+    activities = generate_activities(rng, profiles, activity_count, now)
+    return {"profiles": profiles, "marketing_activities": activities, "followups": generate_followups(rng, activities, now)}
@@ -0,0 +1,285 @@
+# --- START OF FILE benchmarks/fake_supabase.py ---
+# Stand-in Supabase di memori: subset builder PostgREST yang dipakai db_supabase.py, dengan latensi yang bisa diatur.
+
+import itertools
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+# Kolom relasi untuk embed "alias:kolom_fk(kolom, ...)"
+FOREIGN_KEYS = {("profiles", "manager_id"): "profiles", ("followups", "activity_id"): "marketing_activities", ("marketing_activities", "marketer_id"): "profiles"}
+# Embed lewat nama tabel/view tujuan "alias:tujuan!inner(kolom, ...)": (tabel asal, tujuan) -> kolom FK di tabel asal
+TABLE_EMBEDS = {("followups", "marketing_activities"): "activity_id", ("followups", "marketing_activities_with_manager"): "activity_id"}
+# Batas baris per respons (max-rows PostgREST di Supabase); query tanpa paginasi ikut terpotong seperti aslinya
+MAX_ROWS = 1000
+# Tabel dengan id integer (identity); tabel lain memakai uuid
+INTEGER_ID_TABLES = {"marketing_activities", "followups"}
+
+class FakeResponse:
+    def __init__(self, data, count=None): self.data = data; self.count = count
+
+# --- PERBANDINGAN NILAI ---
+def _parse_timestamp(value):
+    try: return datetime.fromisoformat(value.replace("Z", "+00:00")) if isinstance(value, str) and len(value) >= 10 and value[4] == "-" else None
+    except ValueError: return None
+
+def _comparable(left, right):
+    # Nilai filter dari URL selalu berupa teks; samakan tipenya dengan nilai di tabel
+    if isinstance(left, bool) or left is None: return left, right
+    if isinstance(left, (int, float)):
+        try: return left, type(left)(right)
+        except (TypeError, ValueError): return str(left), str(right)
+    left_ts, right_ts = _parse_timestamp(left), _parse_timestamp(str(right))
+    if left_ts and right_ts and (left_ts.tzinfo is None) == (right_ts.tzinfo is None): return left_ts, right_ts
+    return str(left), str(right)
+
+def _like(value, pattern, flags=0):
+    # % dan _ sebagai wildcard, backslash meng-escape karakter berikutnya (escape default Postgres)
+    regex, chars = "^", iter(str(pattern))
+    for ch in chars:
+        if ch == "\\": regex += re.escape(next(chars, ""))
+        else: regex += {"%": ".*", "_": "."}.get(ch) or re.escape(ch)
+    return value is not None and re.match(regex + "$", str(value), flags | re.DOTALL) is not None
+
+def _compare(op, value, target):
+    if op == "is": return value is None if str(target).lower() == "null" else value == (str(target).lower() == "true")
+    if op == "in": return any(_compare("eq", value, item) for item in target)
+    if op == "like": return _like(value, target)
+    if op == "ilike": return _like(value, target, re.IGNORECASE)
+    if value is None: return False
+    left, right = _comparable(value, target)
+    try:
+        return {"eq": left == right, "neq": left != right, "gt": left > right, "gte": left >= right, "lt": left < right, "lte": left <= right}[op]
+    except TypeError:
+        return False
+
+# --- PARSER FILTER or_() ---
+def _split_top_level(expr):
+    parts, depth, quoted, escaped, current = [], 0, False, False, ""
+    for ch in expr:
+        if escaped: escaped = False
+        elif quoted and ch == "\\": escaped = True
+        elif ch == '"': quoted = not quoted
+        elif not quoted and ch == "(": depth += 1
+        elif not quoted and ch == ")": depth -= 1
+        if ch == "," and depth == 0 and not quoted: parts.append(current); current = ""
+        else: current += ch
+    if current: parts.append(current)
+    return parts
+
+def _unquote(value): return re.sub(r'\\(.)', r'\1', value[1:-1]) if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+def _parse_condition(expr, prefix=""):
+    # prefix = "relasi." untuk or_(..., reference_table=relasi)
+    expr = expr.strip()
+    for group, combine in (("and(", all), ("or(", any)):
+        if expr.startswith(group) and expr.endswith(")"):
+            conditions = [_parse_condition(part, prefix) for part in _split_top_level(expr[len(group):-1])]
+            return lambda row: combine(cond(row) for cond in conditions)
+    column, op, value = expr.split(".", 2)
+    negate = op == "not"
+    if negate: op, value = value.split(".", 1)
+    if op == "in": target = [_unquote(item.strip()) for item in _split_top_level(value.strip()[1:-1])]
+    else: target = _unquote(value)
+    column = prefix + column
+    return lambda row: _compare(op, _resolve(row, column), target) != negate
+
+def _resolve(row, column):
+    # Mendukung kolom embed "relasi.kolom" untuk filter pada tabel yang di-embed
+    if "." in column:
+        relation, field = column.split(".", 1); embedded = row.get(relation)
+        return embedded.get(field) if isinstance(embedded, dict) else None
+    return row.get(column)
+
+# --- PARSER SELECT ---
+def _parse_select(columns):
+    fields, embeds = [], []
+    for part in _split_top_level(columns.replace("\n", " ")):
+        part = part.strip()
+        if "(" in part:
+            head, inner = part.split("(", 1); alias, _, source = head.partition(":")
+            source, _, hint = (source or alias).strip().partition("!")
+            embeds.append((alias.split("!")[0].strip(), source, inner[:-1], hint == "inner"))
+        elif part: fields.append(part)
+    return fields, embeds
+
+class FakeQueryBuilder:
+    def __init__(self, client, table):
+        self._client = client; self._table = table; self._operation = "select"; self._columns = "*"; self._payload = None
+        self._filters = []; self._orders = []; self._limit = None; self._offset = 0; self._single = None
+
+    # --- OPERASI ---
+    def select(self, columns="*", count=None): self._operation = "select"; self._columns = columns; return self
+    def insert(self, data): self._operation = "insert"; self._payload = data; return self
+    def update(self, data): self._operation = "update"; self._payload = data; return self
+    def delete(self): self._operation = "delete"; return self
+
+    # --- FILTER ---
+    def _filter(self, column, op, target): self._filters.append(lambda row: _compare(op, _resolve(row, column), target)); return self
+    def eq(self, column, value): return self._filter(column, "eq", value)
+    def neq(self, column, value): return self._filter(column, "neq", value)
+    def gt(self, column, value): return self._filter(column, "gt", value)
+    def gte(self, column, value): return self._filter(column, "gte", value)
+    def lt(self, column, value): return self._filter(column, "lt", value)
+    def lte(self, column, value): return self._filter(column, "lte", value)
+    def like(self, column, pattern): return self._filter(column, "like", pattern)
+    def ilike(self, column, pattern): return self._filter(column, "ilike", pattern)
+    def is_(self, column, value): return self._filter(column, "is", value)
+    def in_(self, column, values):
+        targets = {str(value) for value in values}
+        self._filters.append(lambda row: (value := _resolve(row, column)) is not None and str(value) in targets); return self
+    def or_(self, filters, reference_table=None): self._filters.append(_parse_condition(f"or({filters})", f"{reference_table}." if reference_table else "")); return self
+
+    # --- MODIFIER ---
+    def order(self, column, desc=False, nullsfirst=None): self._orders.append((column, desc)); return self
+    def limit(self, size): self._limit = size; return self
+    def range(self, start, end): self._offset = start; self._limit = end - start + 1; return self
+    def maybe_single(self): self._single = "maybe"; return self
+    def single(self): self._single = "single"; return self
+
+    # --- EKSEKUSI ---
+    def _embed_targets(self, embeds):
+        # (alias, kolom FK, indeks id -> baris tujuan, kolom, inner join) per embed; baris view dihitung sekali per query
+        targets = []
+        for alias, source, inner, inner_join in embeds:
+            if (self._table, source) in FOREIGN_KEYS: fk, target_table = source, FOREIGN_KEYS[(self._table, source)]
+            elif (self._table, source) in TABLE_EMBEDS: fk, target_table = TABLE_EMBEDS[(self._table, source)], source
+            else: continue
+            index = {row.get("id"): row for row in self._client.rows(target_table)} if target_table in VIEWS else self._client.index(target_table)
+            targets.append((alias, fk, index, _parse_select(inner)[0], inner_join))
+        return targets
+
+    def _project(self, row, fields, targets):
+        result = dict(row) if "*" in fields or not fields else {f: row.get(f) for f in fields}
+        for alias, fk, index, inner_fields, _ in targets:
+            target = index.get(row.get(fk))
+            result[alias] = None if target is None else (dict(target) if "*" in inner_fields else {f: target.get(f) for f in inner_fields})
+        return result
+
+    def execute(self):
+        self._client.record_round_trip(self._table, self._operation)
+        with self._client.lock:
+            if self._operation == "insert": data = self._client.insert_rows(self._table, self._payload)
+            elif self._operation == "update": data = self._client.update_rows(self._table, self._payload, self._matches)
+            elif self._operation == "delete": data = self._client.delete_rows(self._table, self._matches)
+            else: data = self._select()
+        if self._single: data = data[0] if data else None
+        if self._single == "maybe" and data is None: return None # Seperti postgrest 1.0.2: maybe_single tanpa baris mengembalikan None, bukan respons
+        return FakeResponse(data, count=len(data) if isinstance(data, list) else None)
+
+    def _matches(self, row): return all(cond(row) for cond in self._filters)
+
+    def _select(self):
+        fields, embeds = _parse_select(self._columns); targets = self._embed_targets(embeds)
+        if targets: # Filter bisa merujuk kolom embed, jadi proyeksikan dulu; embed !inner membuang baris tanpa pasangan
+            inner_aliases = [alias for alias, _, _, _, inner_join in targets if inner_join]
+            projected = (self._project(row, fields, targets) for row in self._client.rows(self._table))
+            rows = [row for row in projected if all(row[alias] is not None for alias in inner_aliases) and self._matches(row)]
+        else:
+            rows = [self._project(row, fields, targets) for row in self._client.rows(self._table) if self._matches(row)]
+        for column, desc in reversed(self._orders):
+            rows.sort(key=lambda row: (row.get(column) is None, _comparable(row.get(column), row.get(column))[0] if row.get(column) is not None else 0), reverse=desc)
+        rows = rows[self._offset:]
+        return rows[:min(self._limit, MAX_ROWS) if self._limit is not None else MAX_ROWS]
+
+class FakeSupabaseClient:
+    def __init__(self, tables, latency_ms=0.0, rpc_functions=None):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in tables.items()}
+        self.latency_ms = latency_ms; self.lock = threading.RLock(); self.round_trips = []
+        self.rpc_functions = {**DEFAULT_RPC_FUNCTIONS, **(rpc_functions or {})}
+        self._ids = {name: itertools.count(max((row["id"] for row in rows if isinstance(row.get("id"), int)), default=0) + 1) for name, rows in self.tables.items()}
+        self._indexes = {}; self._views = {}
+
+    def from_(self, table):
+        if table not in VIEWS: self.tables.setdefault(table, [])
+        return FakeQueryBuilder(self, table)
+    table = from_
+    def rpc(self, name, params=None): return FakeRpcCall(self, name, params or {})
+
+    # --- PENCATATAN ---
+    def record_round_trip(self, table, operation):
+        self.round_trips.append((table, operation, threading.current_thread().name))
+        if self.latency_ms: time.sleep(self.latency_ms / 1000)
+    def reset_round_trips(self): self.round_trips = []
+
+    # --- PENYIMPANAN ---
+    def rows(self, table):
+        # Baris view dibangun sekali dan dipakai ulang sampai ada penulisan
+        if table not in VIEWS: return self.tables[table]
+        if table not in self._views: self._views[table] = VIEWS[table](self)
+        return self._views[table]
+    def index(self, table):
+        if table not in self._indexes: self._indexes[table] = {row.get("id"): row for row in self.tables.get(table, [])}
+        return self._indexes[table]
+    def insert_rows(self, table, payload):
+        now = datetime.now(timezone.utc).isoformat(); inserted = []
+        for data in payload if isinstance(payload, list) else [payload]:
+            row = {"created_at": now, **dict(data)}
+            if table == "marketing_activities": row.setdefault("updated_at", now)
+            if "id" not in row: row["id"] = next(self._ids[table]) if table in INTEGER_ID_TABLES else str(uuid.uuid4())
+            self.tables[table].append(row); inserted.append(dict(row))
+        self._indexes.pop(table, None); self._views.clear()
+        return inserted
+    def update_rows(self, table, data, matches):
+        updated = []
+        for row in self.tables[table]:
+            if matches(row):
+                row.update(data)
+                if table == "marketing_activities": row["updated_at"] = datetime.now(timezone.utc).isoformat() # Padanan trigger set_updated_at
+                updated.append(dict(row))
+        if updated: self._views.clear()
+        return updated
+    def delete_rows(self, table, matches):
+        deleted = [dict(row) for row in self.tables[table] if matches(row)]
+        self.tables[table] = [row for row in self.tables[table] if not matches(row)]; self._indexes.pop(table, None); self._views.clear()
+        return deleted
+
+class FakeRpcCall:
+    def __init__(self, client, name, params): self._client = client; self._name = name; self._params = params
+    def execute(self):
+        self._client.record_round_trip(self._name, "rpc")
+        with self._client.lock: return FakeResponse(self._client.rpc_functions[self._name](self._client, self._params))
+
+# --- PADANAN FUNGSI SQL (supabase_functions.sql) ---
+def _scoped_activities(client, role, user_id):
+    if role == 'superadmin': return client.tables["marketing_activities"]
+    marketer_ids = {user_id}
+    if role == 'manager': marketer_ids |= {p["id"] for p in client.tables["profiles"] if p.get("manager_id") == user_id}
+    return [act for act in client.tables["marketing_activities"] if act.get("marketer_id") in marketer_ids]
+
+def summarize_activities(activities):
+    # Padanan Python dari fungsi SQL get_activity_summary
+    return {"total_activities": len(activities),
+            "unique_prospects": len({act['prospect_name'] for act in activities if act.get('prospect_name') is not None}),
+            "unique_marketers": len({act['marketer_id'] for act in activities if act.get('marketer_id') is not None}),
+            "by_status": dict(Counter(act['status'] for act in activities if act.get('status') is not None)),
+            "by_activity_type": dict(Counter(act['activity_type'] for act in activities if act.get('activity_type') is not None))}
+
+def _rpc_get_activity_summary(client, params): return summarize_activities(_scoped_activities(client, params["p_role"], params["p_user_id"]))
+
+def _rpc_add_followups(client, params):
+    # Validasi dulu agar perilakunya atomik seperti transaksi di Postgres
+    entries = params["p_followups"]; activities = client.index("marketing_activities")
+    missing = [entry.get("activity_id") for entry in entries if entry.get("activity_id") not in activities]
+    if missing: raise ValueError(f"insert or update on table \"followups\" violates foreign key constraint (activity_id {missing[0]})")
+    updated, now = 0, datetime.now(timezone.utc).isoformat()
+    for entry in entries:
+        if entry.get("status_update"): activities[entry["activity_id"]].update(status=entry["status_update"], updated_at=now); updated += 1
+    if updated: client._views.clear()
+    followups = [{key: entry.get(key) for key in ("activity_id", "marketer_id", "marketer_username", "notes", "next_action", "next_followup_date", "interest_level")} for entry in entries if entry.get("notes")]
+    inserted = client.insert_rows("followups", followups) if followups else []
+    affected, profiles = {entry["activity_id"] for entry in entries}, client.index("profiles")
+    owner = lambda activity_id: activities[activity_id].get("marketer_id")
+    return {"activities": [{"id": activity_id, "marketer_id": owner(activity_id), "manager_id": (profiles.get(owner(activity_id)) or {}).get("manager_id")} for activity_id in affected],
+            "statuses_updated": updated, "followups_added": len(inserted)}
+
+DEFAULT_RPC_FUNCTIONS = {"get_activity_summary": _rpc_get_activity_summary, "add_followups": _rpc_add_followups}
+
+def _view_marketing_activities_with_manager(client):
+    profiles = client.index("profiles")
+    return [{**act, "marketer_manager_id": (profiles.get(act.get("marketer_id")) or {}).get("manager_id")} for act in client.tables["marketing_activities"]]
+
+VIEWS = {"marketing_activities_with_manager": _view_marketing_activities_with_manager}
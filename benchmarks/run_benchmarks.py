@@ -0,0 +1,159 @@
+# --- START OF FILE benchmarks/run_benchmarks.py ---
+# Benchmark offline: menjalankan fungsi db dan halaman aplikasi terhadap stand-in Supabase di memori.
+# Contoh: python -m benchmarks.run_benchmarks --scales 1k 10k --latency-ms 20
+#         python -m benchmarks.run_benchmarks --update-baseline
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+import streamlit as st
+from streamlit import logger as streamlit_logger
+from streamlit.testing.v1 import AppTest
+import activity_store
+import db_supabase as db
+from benchmarks.data_generator import SCALES, generate_dataset
+from benchmarks.fake_supabase import FakeSupabaseClient
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app_supabase.py"
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+PAGES = {"page_dashboard": "Dashboard", "page_activities_management": "Aktivitas Pemasaran", "page_user_management": "Manajemen Pengguna"}
+ROLES = ["superadmin", "manager", "marketing"]
+REGRESSION_RATIO = 1.5 # Waktu dianggap regresi jika > 1.5x baseline ...
+REGRESSION_MIN_MS = 5.0 # ... dan selisihnya lebih dari 5 ms (menghindari noise pada operasi cepat)
+
+# --- PERSIAPAN ---
+def _pick_users(data):
+    # Superadmin, manajer dengan tim terbesar, dan satu marketing dari tim tersebut
+    profiles = data["profiles"]
+    team_sizes = {p["id"]: sum(1 for q in profiles if q.get("manager_id") == p["id"]) for p in profiles if p["role"] == "manager"}
+    manager = next(p for p in profiles if p["id"] == max(team_sizes, key=team_sizes.get))
+    return {"superadmin": next(p for p in profiles if p["role"] == "superadmin"), "manager": manager,
+            "marketing": next(p for p in profiles if p.get("manager_id") == manager["id"])}
+
+def _reset_caches(): activity_store.wait_for_refresh(); st.cache_data.clear(); st.cache_resource.clear()
+def _request_round_trips(client):
+    # Round trip yang ditunggu pengguna; refresh store di thread latar tidak ikut dihitung
+    return sum(1 for _, _, thread in client.round_trips if thread != activity_store.REFRESH_THREAD_NAME)
+
+def _db_calls(role, profile, data):
+    user_id = profile["id"]; today = date.today()
+    sample = next(act for act in data["marketing_activities"] if role == "superadmin" or act["marketer_id"] == user_id)
+    owner_manager_id = next((p.get("manager_id") for p in data["profiles"] if p["id"] == sample["marketer_id"]), None) # Seperti detail dari view tim di aplikasi
+    fetch_all = {"superadmin": lambda: db.get_all_marketing_activities(), "manager": lambda: db.get_team_marketing_activities(user_id), "marketing": lambda: db.get_marketing_activities_by_user_id(user_id)}[role]
+    fetch_profiles = lambda: db.get_all_profiles() if role == "superadmin" else db.get_team_profiles(user_id)
+    return {"get_profile": lambda: db.get_profile(user_id), "get_role_profiles": fetch_profiles, "get_all_managers": db.get_all_managers,
+            "get_role_marketing_activities": fetch_all,
+            "get_marketing_activities_page": lambda: db.get_marketing_activities_page(role, user_id, columns=db.LIST_COLUMNS),
+            "get_marketing_activities_page_filtered": lambda: db.get_marketing_activities_page(role, user_id, columns=db.LIST_COLUMNS, filters={"search": sample["prospect_location"], "statuses": [sample["status"]]}),
+            "get_activity_summary": lambda: db.get_activity_summary(role, user_id),
+            "get_upcoming_followups": lambda: db.get_upcoming_followups(role, user_id, today, today + timedelta(days=7)),
+            "get_activity_by_id": lambda: db.get_activity_by_id(sample["id"]),
+            "get_followups_by_activity_id": lambda: db.get_followups_by_activity_id(sample["id"]),
+            "edit_marketing_activity": lambda: db.edit_marketing_activity(sample["id"], sample["prospect_name"], sample["prospect_location"], sample["contact_person"], sample["contact_position"], sample["contact_phone"], sample["contact_email"], sample["activity_date"], sample["activity_type"], sample["description"], sample["status"], owner_manager_id),
+            "add_followup": lambda: db.add_followup(sample["id"], user_id, profile["full_name"], "Catatan benchmark", "Telepon ulang", today, "Sedang", sample["status"])}
+
+# --- PENGUKURAN ---
+def _measure(client, fn, repeat):
+    # Round trip dihitung dari pemanggilan pertama (cold); waktu diambil median dari semua pengulangan
+    timings, round_trips = [], None
+    for _ in range(repeat):
+        client.reset_round_trips(); started = time.perf_counter(); fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        if round_trips is None: round_trips = _request_round_trips(client)
+    return {"ms": round(statistics.median(timings), 3), "round_trips": round_trips}
+
+def bench_db(client, role, profile, data, repeat):
+    results = {}
+    for name, fn in _db_calls(role, profile, data).items():
+        _reset_caches() # Setiap fungsi diukur dari cache kosong (cold)
+        results[name] = _measure(client, fn, repeat)
+    return results
+
+def bench_page(client, page_fn, profile):
+    # Satu rerun cold (cache kosong) dan satu rerun warm, lewat AppTest agar seluruh skrip halaman ikut dijalankan
+    _reset_caches()
+    at = AppTest.from_file(str(APP_PATH), default_timeout=600)
+    at.secrets["supabase"] = {"url": "http://localhost", "key": "benchmark"}
+    at.session_state["logged_in"] = True; at.session_state["user"] = SimpleNamespace(id=profile["id"])
+    at.session_state["profile"] = dict(profile); at.session_state["page_selection"] = PAGES[page_fn]
+    result = {}
+    for run in ("cold", "warm"):
+        client.reset_round_trips(); started = time.perf_counter(); at.run(); elapsed = time.perf_counter() - started
+        activity_store.wait_for_refresh() # Rerun berikutnya diukur setelah refresh latar selesai
+        rerun = at.session_state["_perf_rerun"] if "_perf_rerun" in at.session_state else {"pages": [], "queries": []}
+        page_ms = next((p["ms"] for p in rerun["pages"] if p["name"] == page_fn), None)
+        result[run] = {"ms": round(elapsed * 1000, 3), "page_ms": round(page_ms, 3) if page_ms is not None else None,
+                       "round_trips": _request_round_trips(client), "error": str(at.exception[0].message) if at.exception else None}
+    return result
+
+def run_scale(scale, latency_ms, repeat):
+    data = generate_dataset(scale); users = _pick_users(data); results = {}
+    for role in ROLES:
+        # Klien baru per role agar penulisan benchmark sebelumnya tidak memengaruhi hasil
+        client = FakeSupabaseClient(data, latency_ms=latency_ms); db.init_connection = lambda: client
+        pages = {name: bench_page(client, name, users[role]) for name in PAGES if name != "page_user_management" or role != "marketing"}
+        results[role] = {"pages": pages, "db": bench_db(client, role, users[role], data, repeat)}
+    return results
+
+# --- PERBANDINGAN BASELINE ---
+def _round_trips_only(results):
+    # Baseline yang di-commit hanya memuat round trip; waktu bergantung mesin dan hanya disimpan bila diminta (--keep-timings)
+    if isinstance(results, dict) and "round_trips" in results: return {"round_trips": results["round_trips"]}
+    return {key: _round_trips_only(value) for key, value in results.items()} if isinstance(results, dict) else results
+
+def _flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict) and "round_trips" not in value: yield from _flatten(value, f"{prefix}{key}/")
+        elif isinstance(value, dict): yield f"{prefix}{key}", value
+
+def compare(results, baseline, compare_timings):
+    regressions = []
+    current, previous = dict(_flatten(results)), dict(_flatten(baseline))
+    for key, metrics in current.items():
+        base = previous.get(key)
+        if base is None: continue
+        if metrics.get("error"): regressions.append(f"{key}: error {metrics['error']}")
+        if metrics["round_trips"] > base["round_trips"]: regressions.append(f"{key}: round trip {base['round_trips']} -> {metrics['round_trips']}")
+        if compare_timings and "ms" in base and metrics["ms"] > base["ms"] * REGRESSION_RATIO and metrics["ms"] - base["ms"] > REGRESSION_MIN_MS:
+            regressions.append(f"{key}: {base['ms']:.1f} ms -> {metrics['ms']:.1f} ms")
+    return regressions
+
+def print_report(results):
+    for key, metrics in _flatten(results):
+        page_ms = f" (halaman {metrics['page_ms']:.1f} ms)" if metrics.get("page_ms") is not None else ""
+        error = f"  ERROR: {metrics['error']}" if metrics.get("error") else ""
+        print(f"{key:<70} {metrics['ms']:>10.1f} ms{page_ms}  {metrics['round_trips']:>5} round trip{error}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline EMI Marketing Tracker dengan stand-in Supabase.")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["1k", "10k"])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latensi tambahan per round trip")
+    parser.add_argument("--repeat", type=int, default=3, help="Pengulangan per fungsi db (diambil median)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--keep-timings", action="store_true", help="Simpan juga waktu di baseline (untuk baseline lokal, bukan yang di-commit)")
+    parser.add_argument("--compare-timings", action="store_true", help="Bandingkan juga waktu bila baseline memuatnya (hanya berarti di mesin dan latensi yang sama)")
+    args = parser.parse_args(argv)
+    streamlit_logger.set_log_level("error") # Peringatan bare mode tidak relevan di sini
+
+    results = {"latency_ms": args.latency_ms, "scales": {}}
+    for scale in args.scales:
+        print(f"=== Skala {scale} ==="); results["scales"][scale] = run_scale(scale, args.latency_ms, args.repeat)
+        print_report(results["scales"][scale])
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results if args.keep_timings else _round_trips_only(results), indent=2) + "\n"); print(f"Baseline disimpan ke {args.baseline}"); return 0
+    if not args.baseline.exists(): print("Baseline belum ada; jalankan dengan --update-baseline."); return 0
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results["scales"], baseline["scales"], compare_timings=args.compare_timings and baseline.get("latency_ms") == args.latency_ms)
+    for line in regressions: print(f"REGRESI {line}")
+    print("Tidak ada regresi terhadap baseline." if not regressions else f"{len(regressions)} regresi ditemukan.")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
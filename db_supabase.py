@@ -1,7 +1,14 @@
 # --- START OF FILE db_supabase.py (Versi Final Absolut) ---
 
+import contextvars
+import threading
+import time
 import streamlit as st
+import perf_monitor
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from supabase import create_client, Client
+from collections import OrderedDict
 from datetime import datetime, date
 from gotrue.errors import AuthApiError
 
@@ -14,9 +21,73 @@ def init_connection() -> Client:
     except Exception as e:
         st.error(f"Gagal terhubung ke Supabase. Detail: {e}"); st.stop()
 
+DATA_TABLES = ("marketing_activities", "followups", "profiles")
+ACTIVITY_PAGE_SIZE = 50
+# Kolom untuk tampilan daftar & dashboard; deskripsi dan kontak lengkap hanya dimuat lewat get_activity_by_id
+LIST_COLUMNS = "id, created_at, updated_at, marketer_id, marketer_username, activity_date, prospect_name, prospect_location, contact_person, activity_type, status"
+STORE_COLUMNS = LIST_COLUMNS + ", marketer_manager_id" # Store bersama (activity_store) dimuat dari view tim agar bisa diindeks per manajer
+DETAIL_CACHE_SIZE = 128
+DETAIL_CACHE_TTL_SECONDS = 300
+FETCH_PAGE_SIZE = 1000 # Batas baris default PostgREST per permintaan; pengambilan "semua baris" dipecah per halaman keyset
+INSERT_CHUNK_SIZE = 500 # Jumlah baris per insert multi-baris pada impor massal
+
 def date_to_str(dt):
     return dt.strftime("%Y-%m-%d") if isinstance(dt, (date, datetime)) else dt
 
+_execute = perf_monitor.execute # Setiap round trip PostgREST dicatat per rerun (lihat perf_monitor)
+
+def _iter_keyset(build_query, order_column, desc=False, page_size=FETCH_PAGE_SIZE):
+    # Semua baris hasil query, halaman demi halaman dengan keyset (order_column, id); build_query() membuat query baru per halaman
+    cursor, op = None, "lt" if desc else "gt"
+    while True:
+        query = build_query()
+        if cursor: query = query.or_(f'{order_column}.{op}."{cursor[0]}",and({order_column}.eq."{cursor[0]}",id.{op}.{cursor[1]})')
+        rows = _execute(query.order(order_column, desc=desc).order("id", desc=desc).limit(page_size)).data or []
+        yield from rows
+        if len(rows) < page_size: return
+        cursor = (rows[-1][order_column], rows[-1]['id'])
+
+def run_concurrently(*calls):
+    # Menjalankan pemanggilan yang saling independen secara paralel; konteks Streamlit dan contextvars diteruskan ke thread
+    # agar cache dan instrumentasi per rerun tetap berfungsi. Hasil dikembalikan sesuai urutan argumen.
+    if len(calls) < 2: return [call() for call in calls]
+    ctx, context = get_script_run_ctx(suppress_warning=True), contextvars.copy_context()
+    def run(call):
+        if ctx: add_script_run_ctx(threading.current_thread(), ctx)
+        return context.copy().run(call)
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool: return list(pool.map(run, calls))
+
+# --- VERSI DATA & INVALIDASI CACHE ---
+@st.cache_resource
+def _data_version_registry():
+    # Satu registry per proses: versi per (tabel, cakupan) dan manager_id tiap marketer
+    return {"lock": threading.Lock(), "versions": {}, "managers": {}}
+
+def data_scope(role, user_id): return "all" if role == 'superadmin' else f"{'team' if role == 'manager' else 'user'}:{user_id}"
+def get_data_version(scope, tables=DATA_TABLES):
+    versions = _data_version_registry()["versions"]
+    return tuple(versions.get((table, scope), 0) for table in tables)
+MANAGER_UNKNOWN = object() # Penanda bahwa penulisan tidak membawa manager_id (None berarti marketer tanpa manajer)
+def _get_manager_id(marketer_id):
+    # Cadangan bila penulisan tidak membawa manager_id; profil yang tidak ditemukan tidak disimpan agar dicoba lagi nanti
+    managers = _data_version_registry()["managers"]
+    if marketer_id not in managers:
+        profile = get_profile(marketer_id)
+        if not profile: return None
+        managers[marketer_id] = profile.get('manager_id')
+    return managers[marketer_id]
+def invalidate_data(marketer_id, tables, manager_id=MANAGER_UNKNOWN):
+    # Hanya cakupan yang memuat data marketer ini: dirinya, timnya (jika manager), manajernya, dan superadmin
+    if not marketer_id: return
+    if manager_id is MANAGER_UNKNOWN: manager_id = _get_manager_id(marketer_id)
+    else: _data_version_registry()["managers"][marketer_id] = manager_id # Diambil dari data penulisan itu sendiri
+    scopes = {"all", f"user:{marketer_id}", f"team:{marketer_id}"}
+    if manager_id: scopes.add(f"team:{manager_id}")
+    registry = _data_version_registry()
+    with registry["lock"]:
+        for table in tables:
+            for scope in scopes: registry["versions"][(table, scope)] = registry["versions"].get((table, scope), 0) + 1
+
 # --- FUNGSI AUTENTIKASI ---
 def sign_in(email, password):
     supabase = init_connection()
@@ -35,7 +106,8 @@ def create_user_as_admin(email, password, full_name, role, manager_id=None):
         user = user_response.user
         if user and user.id:
             profile_data = {"id": user.id, "full_name": full_name, "role": role, "email": email, "manager_id": manager_id}
-            supabase.from_("profiles").insert(profile_data).execute()
+            _execute(supabase.from_("profiles").insert(profile_data))
+            invalidate_data(user.id, ("profiles",), manager_id)
             return user, None
         else:
             return None, "Gagal membuat entri otentikasi."
@@ -45,48 +117,167 @@ def create_user_as_admin(email, password, full_name, role, manager_id=None):
 def get_profile(user_id):
     if not user_id: return None
     try:
-        return init_connection().from_("profiles").select("*").eq("id", user_id).maybe_single().execute().data
+        response = _execute(init_connection().from_("profiles").select("*").eq("id", user_id).maybe_single())
+        return response.data if response else None # maybe_single tanpa baris mengembalikan None
     except: return None
 
 # --- MANAJEMEN PENGGUNA ---
-def get_all_profiles(): return init_connection().from_("profiles").select("*, manager:manager_id(full_name)").execute().data
+def get_all_profiles(): return _execute(init_connection().from_("profiles").select("*, manager:manager_id(full_name)")).data
 def get_team_profiles(manager_id):
     if not manager_id: return []
-    return init_connection().from_("profiles").select("*, manager:manager_id(full_name)").or_(f"id.eq.{manager_id},manager_id.eq.{manager_id}").execute().data
-def get_all_managers(): return init_connection().from_("profiles").select("id, full_name").eq("role", "manager").execute().data
+    return _execute(init_connection().from_("profiles").select("*, manager:manager_id(full_name)").or_(f"id.eq.{manager_id},manager_id.eq.{manager_id}")).data
+def get_all_managers(): return _execute(init_connection().from_("profiles").select("id, full_name").eq("role", "manager")).data
+
+# --- CAKUPAN DATA BERDASARKAN ROLE ---
+TEAM_ACTIVITIES_VIEW = "marketing_activities_with_manager" # marketing_activities + manager_id pemiliknya (lihat supabase_functions.sql)
+def _scoped_activities_query(role, user_id, columns="*"):
+    # Satu query untuk setiap role: tim manajer difilter lewat view, tanpa query terpisah ke profiles
+    supabase = init_connection()
+    if role == 'superadmin': return supabase.from_("marketing_activities").select(columns)
+    if role == 'manager': return supabase.from_(TEAM_ACTIVITIES_VIEW).select(columns).or_(f"marketer_id.eq.{user_id},marketer_manager_id.eq.{user_id}")
+    return supabase.from_("marketing_activities").select(columns).eq("marketer_id", user_id)
+
+# --- FILTER & PENCARIAN AKTIVITAS ---
+SEARCH_COLUMNS = ("prospect_name", "prospect_location", "contact_person") # Masing-masing punya index trigram (lihat supabase_functions.sql)
+
+def _ilike_contains(term):
+    # Wildcard LIKE dari input di-escape, lalu nilai dikutip agar koma/kurung aman di dalam or=()
+    escaped = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return '"' + escaped.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _apply_activity_filters(query, filters):
+    # filters: search, statuses, activity_types, marketer_id, date_from, date_to (semua opsional); semuanya dievaluasi di Postgres
+    if not filters: return query
+    search = (filters.get("search") or "").strip()
+    if search: query = query.or_(",".join(f"{col}.ilike.{_ilike_contains(search)}" for col in SEARCH_COLUMNS))
+    if filters.get("statuses"): query = query.in_("status", list(filters["statuses"]))
+    if filters.get("activity_types"): query = query.in_("activity_type", list(filters["activity_types"]))
+    if filters.get("marketer_id"): query = query.eq("marketer_id", filters["marketer_id"])
+    if filters.get("date_from"): query = query.gte("activity_date", date_to_str(filters["date_from"]))
+    if filters.get("date_to"): query = query.lte("activity_date", date_to_str(filters["date_to"]))
+    return query
 
 # --- AKTIVITAS PEMASARAN (BENTUK ASLI YANG SEDERHANA) ---
-def get_all_marketing_activities(): return init_connection().from_("marketing_activities").select("*").order("created_at", desc=True).execute().data
-def get_marketing_activities_by_user_id(user_id):
+def _apply_since(query, since):
+    # Sinkronisasi delta: hanya baris yang dibuat atau diubah sejak watermark
+    return query if not since else query.or_(f'created_at.gte."{since}",updated_at.gte."{since}"')
+# Semua baris diambil per halaman keyset (created_at, id) terbaru dulu, agar tidak terpotong batas baris PostgREST
+def _all_scoped_activities(role, user_id, since, columns): return list(_iter_keyset(lambda: _apply_since(_scoped_activities_query(role, user_id, columns), since), "created_at", desc=True))
+def get_all_marketing_activities(since=None, columns="*"): return _all_scoped_activities('superadmin', None, since, columns)
+def get_marketing_activities_by_user_id(user_id, since=None, columns="*"):
     if not user_id: return []
-    return init_connection().from_("marketing_activities").select("*").eq("marketer_id", user_id).order("created_at", desc=True).execute().data
-def get_team_marketing_activities(manager_id):
+    return _all_scoped_activities('marketing', user_id, since, columns)
+def get_team_marketing_activities(manager_id, since=None, columns="*"):
     if not manager_id: return []
-    supabase = init_connection(); team_ids_res = supabase.from_("profiles").select("id").eq("manager_id", manager_id).execute(); team_ids = [m['id'] for m in team_ids_res.data]; team_ids.append(manager_id)
-    return supabase.from_("marketing_activities").select("*").in_("marketer_id", team_ids).order("created_at", desc=True).execute().data
+    return _all_scoped_activities('manager', manager_id, since, columns)
+def get_all_marketing_activities_with_manager(since=None, columns="*"): return list(_iter_keyset(lambda: _apply_since(init_connection().from_(TEAM_ACTIVITIES_VIEW).select(columns), since), "created_at", desc=True))
+def get_prospect_activities(role, user_id, prospect_name, columns="*"):
+    # Semua aktivitas satu prospek dalam cakupan role (prospect_name ber-index trigram, yang juga melayani kesamaan)
+    if not prospect_name: return []
+    return list(_iter_keyset(lambda: _scoped_activities_query(role, user_id, columns).eq("prospect_name", prospect_name), "created_at", desc=True))
+def get_marketing_activities_page(role, user_id, cursor=None, page_size=ACTIVITY_PAGE_SIZE, columns="*", filters=None):
+    # Paginasi keyset pada (created_at, id): cursor = (created_at, id) dari baris terakhir halaman sebelumnya
+    query = _apply_activity_filters(_scoped_activities_query(role, user_id, columns), filters)
+    if cursor:
+        created_at, activity_id = cursor
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{activity_id})')
+    rows = _execute(query.order("created_at", desc=True).order("id", desc=True).limit(page_size + 1)).data or []
+    next_cursor = (rows[page_size - 1]['created_at'], rows[page_size - 1]['id']) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+# --- DETAIL AKTIVITAS (LRU) ---
+@st.cache_resource
+def _activity_detail_cache():
+    # Detail lengkap yang baru dibuka: id -> (waktu diambil, baris), urutan = terakhir dipakai
+    return {"lock": threading.Lock(), "rows": OrderedDict()}
+def _forget_activity(activity_id):
+    cache = _activity_detail_cache()
+    with cache["lock"]: cache["rows"].pop(activity_id, None)
 def get_activity_by_id(activity_id):
     if not activity_id: return None
-    return init_connection().from_("marketing_activities").select("*").eq("id", activity_id).maybe_single().execute().data
+    cache = _activity_detail_cache()
+    with cache["lock"]:
+        cached = cache["rows"].get(activity_id)
+        if cached and time.monotonic() - cached[0] < DETAIL_CACHE_TTL_SECONDS:
+            cache["rows"].move_to_end(activity_id); return dict(cached[1])
+    # Dari view tim agar marketer_manager_id ikut terbawa ke edit_marketing_activity
+    response = _execute(init_connection().from_(TEAM_ACTIVITIES_VIEW).select("*").eq("id", activity_id).maybe_single())
+    activity = response.data if response else None # maybe_single tanpa baris mengembalikan None
+    if activity:
+        with cache["lock"]:
+            cache["rows"][activity_id] = (time.monotonic(), activity); cache["rows"].move_to_end(activity_id)
+            while len(cache["rows"]) > DETAIL_CACHE_SIZE: cache["rows"].popitem(last=False)
+    return dict(activity) if activity else activity
+
+# --- RINGKASAN AKTIVITAS (AGREGASI DI SERVER) ---
+def get_activity_summary(role, user_id):
+    # Satu panggilan RPC; hasilnya hanya hitungan, bukan baris aktivitas
+    return _execute(init_connection().rpc("get_activity_summary", {"p_role": role, "p_user_id": user_id})).data
 
-def add_marketing_activity(marketer_id, marketer_username, prospect_name, prospect_location, contact_person, contact_position, contact_phone, contact_email, activity_date, activity_type, description, status):
+def add_marketing_activity(marketer_id, marketer_username, prospect_name, prospect_location, contact_person, contact_position, contact_phone, contact_email, activity_date, activity_type, description, status, manager_id=MANAGER_UNKNOWN):
     supabase = init_connection()
     try:
         data = {"marketer_id": marketer_id, "marketer_username": marketer_username, "prospect_name": prospect_name, "prospect_location": prospect_location, "contact_person": contact_person, "contact_position": contact_position, "contact_phone": contact_phone, "contact_email": contact_email, "activity_date": activity_date, "activity_type": activity_type, "description": description, "status": status}
-        response = supabase.from_("marketing_activities").insert(data).execute()
+        response = _execute(supabase.from_("marketing_activities").insert(data))
+        invalidate_data(marketer_id, ("marketing_activities",), manager_id)
         return True, "Aktivitas berhasil ditambahkan!", response.data[0].get("id") if response.data else None
     except Exception as e: return False, f"Gagal menambahkan aktivitas: {e}", None
 
-def edit_marketing_activity(activity_id, prospect_name, prospect_location, contact_person, contact_position, contact_phone, contact_email, activity_date, activity_type, description, status):
+def add_marketing_activities_bulk(activities, manager_id=MANAGER_UNKNOWN):
+    # Insert multi-baris per chunk; chunk yang gagal dilaporkan sebagai (indeks awal, indeks akhir, pesan) tanpa menghentikan chunk lain.
+    # manager_id berlaku untuk semua baris (impor selalu atas nama satu marketer)
+    supabase = init_connection(); inserted, failed_chunks = 0, []
+    for start in range(0, len(activities), INSERT_CHUNK_SIZE):
+        chunk = activities[start:start + INSERT_CHUNK_SIZE]
+        try: _execute(supabase.from_("marketing_activities").insert(chunk)); inserted += len(chunk)
+        except Exception as e: failed_chunks.append((start, start + len(chunk) - 1, f"Gagal menambahkan aktivitas: {e}"))
+    for marketer_id in {act.get("marketer_id") for act in activities}: invalidate_data(marketer_id, ("marketing_activities",), manager_id)
+    return inserted, failed_chunks
+
+def edit_marketing_activity(activity_id, prospect_name, prospect_location, contact_person, contact_position, contact_phone, contact_email, activity_date, activity_type, description, status, manager_id=MANAGER_UNKNOWN):
     supabase = init_connection()
     try:
         data = {"prospect_name": prospect_name, "prospect_location": prospect_location, "contact_person": contact_person, "contact_position": contact_position, "contact_phone": contact_phone, "contact_email": contact_email, "activity_date": activity_date, "activity_type": activity_type, "description": description, "status": status}
-        supabase.from_("marketing_activities").update(data).eq("id", activity_id).execute()
+        response = _execute(supabase.from_("marketing_activities").update(data).eq("id", activity_id)); _forget_activity(activity_id)
+        if response.data: invalidate_data(response.data[0].get("marketer_id"), ("marketing_activities",), manager_id)
         return True, "Aktivitas berhasil diperbarui."
     except Exception as e: return False, f"Gagal memperbarui: {e}"
 
 # --- FOLLOW-UP ---
-def get_followups_by_activity_id(activity_id): return init_connection().from_("followups").select("*").eq("activity_id", str(activity_id)).execute().data
+def get_followups_by_activity_id(activity_id): return _execute(init_connection().from_("followups").select("*").eq("activity_id", str(activity_id)).order("created_at")).data
+def get_all_followups(since=None):
+    # Urut created_at naik (urutan riwayat), per halaman keyset agar semua follow-up terambil, bukan hanya 1000 yang tertua
+    def build_query():
+        query = init_connection().from_("followups").select("*")
+        return query.gte("created_at", since) if since else query
+    return list(_iter_keyset(build_query, "created_at"))
+def get_upcoming_followups(role, user_id, start_date, end_date):
+    # Follow-up di jendela tanggal beserta nama prospeknya dalam satu query (per halaman): aktivitas di-embed dengan
+    # inner join ke view tim, sehingga cakupan role difilter di server dan follow-up di luar cakupan tidak ikut terkirim
+    def build_query():
+        query = init_connection().from_("followups").select(f"*, activity:{TEAM_ACTIVITIES_VIEW}!inner(prospect_name, marketer_id, marketer_manager_id)")
+        query = query.gte("next_followup_date", date_to_str(start_date)).lte("next_followup_date", date_to_str(end_date))
+        if role == 'superadmin': return query
+        if role == 'manager': return query.or_(f"marketer_id.eq.{user_id},marketer_manager_id.eq.{user_id}", reference_table="activity")
+        return query.eq("activity.marketer_id", user_id)
+    followups = list(_iter_keyset(build_query, "next_followup_date"))
+    for fu in followups: fu['prospect_name'] = fu.pop('activity').get('prospect_name') or 'N/A'
+    return followups
+def add_followups_bulk(entries):
+    # Satu RPC transaksional (lihat add_followups di supabase_functions.sql): update status dan insert follow-up
+    # untuk banyak aktivitas sekaligus, semuanya berhasil atau tidak sama sekali. Entri tanpa notes hanya mengubah status.
+    if not entries: return False, "Tidak ada follow-up untuk disimpan."
+    payload = [{**entry, "next_followup_date": date_to_str(entry.get("next_followup_date"))} for entry in entries]
+    try: result = _execute(init_connection().rpc("add_followups", {"p_followups": payload})).data
+    except Exception as e: return False, f"Gagal menyimpan follow-up: {e}"
+    for act in result["activities"]: _forget_activity(act["id"])
+    for marketer_id, manager_id in {(act["marketer_id"], act.get("manager_id")) for act in result["activities"]}: invalidate_data(marketer_id, ("marketing_activities", "followups"), manager_id)
+    return True, f"{result['followups_added']} follow-up dan {result['statuses_updated']} status berhasil disimpan."
 def add_followup(activity_id, marketer_id, marketer_username, notes, next_action, next_followup_date, interest_level, status_update):
-    supabase = init_connection(); supabase.from_("marketing_activities").update({"status": status_update}).eq("id", activity_id).execute()
-    data = {"activity_id": activity_id, "marketer_id": marketer_id, "marketer_username": marketer_username, "notes": notes, "next_action": next_action, "next_followup_date": date_to_str(next_followup_date), "interest_level": interest_level}
-    supabase.from_("followups").insert(data).execute(); return True, "Follow-up berhasil ditambahkan."
\ No newline at end of file
+    success, msg = add_followups_bulk([{"activity_id": activity_id, "marketer_id": marketer_id, "marketer_username": marketer_username, "notes": notes, "next_action": next_action, "next_followup_date": next_followup_date, "interest_level": interest_level, "status_update": status_update}])
+    return (True, "Follow-up berhasil ditambahkan.") if success else (False, msg)
+
+# --- INSTRUMENTASI ---
+# Setiap fungsi publik dicatat waktu dan round trip-nya per rerun (lihat perf_monitor); fungsi yang bukan query atau hanya
+# mendelegasikan dikecualikan, dan pemanggilan bertingkat dihitung pada fungsi terluar
+perf_monitor.instrument_functions(globals(), exclude={"date_to_str", "data_scope", "get_data_version", "invalidate_data", "run_concurrently"})
@@ -0,0 +1,104 @@
+# --- START OF FILE perf_monitor.py ---
+
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+from datetime import datetime, timezone
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Catatan per rerun disimpan di session_state agar tidak tercampur antar sesi
+RERUN_KEY = "_perf_rerun"
+PAYLOAD_SAMPLE_ROWS = 20 # Ukuran payload diperkirakan dari beberapa baris pertama, bukan serialisasi seluruh hasil
+
+# Pemanggilan fungsi db terluar yang sedang berjalan; round trip dan pemanggilan bertingkat dicatat ke entri ini
+_active_call = contextvars.ContextVar("perf_active_call", default=None)
+_lock = threading.Lock()
+
+def start_rerun(): st.session_state[RERUN_KEY] = {"started_at": time.perf_counter(), "queries": [], "pages": []}
+def _current_rerun():
+    # Di luar rerun (thread latar, skrip benchmark) tidak ada yang dicatat
+    if get_script_run_ctx(suppress_warning=True) is None: return None
+    try: return st.session_state.get(RERUN_KEY)
+    except Exception: return None
+
+def _payload_stats(data):
+    # data = response.data PostgREST: list baris, satu baris (dict/maybe_single), atau nilai skalar RPC
+    if isinstance(data, list): rows, sample = len(data), data[:PAYLOAD_SAMPLE_ROWS]
+    elif isinstance(data, dict): rows, sample = 1, [data]
+    else: return 0, 0
+    return rows, (len(json.dumps(sample, default=str)) * rows // len(sample) if sample else 0)
+
+def execute(query):
+    # Satu round trip ke Supabase: dicatat pada pemanggilan fungsi db terluar (atau entri tersendiri bila dipanggil langsung)
+    started = time.perf_counter(); response = None
+    try:
+        response = query.execute(); return response
+    finally:
+        rerun = _current_rerun()
+        if rerun is not None:
+            rows, size = _payload_stats(getattr(response, "data", None))
+            call = _active_call.get()
+            with _lock:
+                if call is None: rerun["queries"].append({"name": "execute", "ms": (time.perf_counter() - started) * 1000, "round_trips": 1, "rows": rows, "bytes": size, "error": None})
+                else: call["round_trips"] += 1; call["rows"] += rows; call["bytes"] += size
+
+def instrument_query(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active_call.get() is not None: return func(*args, **kwargs) # Bertingkat: dihitung pada pemanggil terluar
+        call = {"name": func.__name__, "ms": 0.0, "round_trips": 0, "rows": 0, "bytes": 0, "error": None}
+        started = time.perf_counter(); token = _active_call.set(call)
+        try: return func(*args, **kwargs)
+        except Exception as e:
+            call["error"] = type(e).__name__; raise
+        finally:
+            _active_call.reset(token); call["ms"] = (time.perf_counter() - started) * 1000
+            rerun = _current_rerun()
+            if rerun is not None:
+                with _lock: rerun["queries"].append(call)
+    return wrapper
+
+def instrument_functions(namespace, exclude=()):
+    # Membungkus semua fungsi publik di modul (dipanggil dengan globals()) sehingga pemanggilan internal ikut tercatat
+    module_name = namespace["__name__"]
+    for name, obj in list(namespace.items()):
+        if inspect.isfunction(obj) and obj.__module__ == module_name and not name.startswith("_") and name not in exclude:
+            namespace[name] = instrument_query(obj)
+
+def timed_page(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try: return func(*args, **kwargs)
+        finally:
+            rerun = _current_rerun()
+            if rerun is not None: rerun["pages"].append({"name": func.__name__, "ms": (time.perf_counter() - started) * 1000})
+    return wrapper
+
+def rerun_summary():
+    rerun = _current_rerun()
+    if not rerun: return None
+    queries = rerun["queries"]
+    return {"total_ms": (time.perf_counter() - rerun["started_at"]) * 1000, "call_count": len(queries), "round_trips": sum(q["round_trips"] for q in queries),
+            "query_ms": sum(q["ms"] for q in queries), "rows": sum(q["rows"] for q in queries), "bytes": sum(q["bytes"] for q in queries),
+            "pages": rerun["pages"], "queries": queries}
+
+def append_log(summary, path, **context):
+    # Satu baris JSON per rerun, untuk analisis regresi N+1 dan cakupan role yang lambat
+    record = {"timestamp": datetime.now(timezone.utc).isoformat(), **context, **summary}
+    line = json.dumps(record, default=str) + "\n"
+    # Sesi Streamlit berjalan di thread terpisah; kunci mencegah baris dari rerun bersamaan saling menyela
+    with _lock, open(path, "a", encoding="utf-8") as f: f.write(line)
+
+def show_perf_panel(summary):
+    with st.sidebar.expander("⏱️ Performa Rerun Ini"):
+        col1, col2 = st.columns(2)
+        col1.metric("Round Trip", summary["round_trips"]); col2.metric("Total (ms)", f"{summary['total_ms']:.0f}")
+        col1.metric("Waktu Query (ms)", f"{summary['query_ms']:.0f}"); col2.metric("Payload (KB)", f"{summary['bytes'] / 1024:.1f}")
+        for page in summary["pages"]: st.caption(f"{page['name']}: {page['ms']:.0f} ms")
+        if summary["queries"]:
+            st.dataframe(summary["queries"], use_container_width=True, hide_index=True)
@@ -0,0 +1,117 @@
+-- --- START OF FILE supabase_functions.sql ---
+-- Index, view, dan fungsi pendukung untuk EMI Marketing Tracker.
+-- Jalankan di Supabase SQL Editor setelah tabel profiles, marketing_activities, dan followups dibuat.
+
+-- --- FOLLOW-UP ---
+-- Jadwal follow-up di dashboard difilter berdasarkan rentang next_followup_date dan dipaginasi keyset pada (next_followup_date, id)
+create index if not exists followups_next_followup_date_id_idx on public.followups (next_followup_date, id);
+create index if not exists followups_activity_id_idx on public.followups (activity_id);
+
+-- --- AKTIVITAS PEMASARAN ---
+-- Paginasi keyset pada (created_at, id), untuk semua data maupun per marketer
+create index if not exists marketing_activities_created_at_id_idx on public.marketing_activities (created_at desc, id desc);
+create index if not exists marketing_activities_marketer_created_at_id_idx on public.marketing_activities (marketer_id, created_at desc, id desc);
+
+-- --- FILTER & PENCARIAN AKTIVITAS ---
+-- Pencarian teks memakai ilike '%kata%' pada nama prospek, lokasi, dan kontak; index trigram melayani pola
+-- "mengandung" maupun awalan. Filter status/jenis/tanggal memakai btree biasa.
+create extension if not exists pg_trgm with schema extensions;
+create index if not exists marketing_activities_prospect_name_trgm_idx on public.marketing_activities using gin (prospect_name extensions.gin_trgm_ops);
+create index if not exists marketing_activities_prospect_location_trgm_idx on public.marketing_activities using gin (prospect_location extensions.gin_trgm_ops);
+create index if not exists marketing_activities_contact_person_trgm_idx on public.marketing_activities using gin (contact_person extensions.gin_trgm_ops);
+create index if not exists marketing_activities_status_created_at_idx on public.marketing_activities (status, created_at desc, id desc);
+create index if not exists marketing_activities_activity_type_idx on public.marketing_activities (activity_type);
+create index if not exists marketing_activities_activity_date_idx on public.marketing_activities (activity_date);
+
+-- --- RINGKASAN AKTIVITAS ---
+-- Dipanggil lewat db.get_activity_summary(); cakupan role sama dengan fungsi get_*_marketing_activities.
+-- Padanan Python untuk pengujian lokal: db.summarize_activities().
+create or replace function public.get_activity_summary(p_role text, p_user_id uuid)
+returns json
+language sql
+stable
+as $$
+  with scoped as (
+    select a.prospect_name, a.marketer_id, a.status, a.activity_type
+    from public.marketing_activities a
+    where p_role = 'superadmin'
+       or a.marketer_id = p_user_id
+       or (p_role = 'manager' and a.marketer_id in (select p.id from public.profiles p where p.manager_id = p_user_id))
+  )
+  select json_build_object(
+    'total_activities', (select count(*) from scoped),
+    'unique_prospects', (select count(distinct prospect_name) from scoped),
+    'unique_marketers', (select count(distinct marketer_id) from scoped),
+    'by_status', coalesce((select json_object_agg(status, n) from (select status, count(*) as n from scoped where status is not null group by status) s), '{}'::json),
+    'by_activity_type', coalesce((select json_object_agg(activity_type, n) from (select activity_type, count(*) as n from scoped where activity_type is not null group by activity_type) t), '{}'::json)
+  );
+$$;
+
+create index if not exists profiles_manager_id_idx on public.profiles (manager_id);
+
+-- --- SINKRONISASI INKREMENTAL ---
+-- activity_store mengambil delta berdasarkan created_at/updated_at sejak watermark terakhir
+alter table public.marketing_activities add column if not exists updated_at timestamptz not null default now();
+
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at = now();
+  return new;
+end;
+$$;
+
+drop trigger if exists marketing_activities_set_updated_at on public.marketing_activities;
+create trigger marketing_activities_set_updated_at
+  before update on public.marketing_activities
+  for each row execute function public.set_updated_at();
+
+create index if not exists marketing_activities_updated_at_idx on public.marketing_activities (updated_at);
+
+-- --- CAKUPAN TIM MANAJER ---
+-- Aktivitas beserta manager_id pemiliknya, sehingga aktivitas satu tim bisa diambil dalam satu query:
+--   marketing_activities_with_manager?or=(marketer_id.eq.<id>,marketer_manager_id.eq.<id>)
+create or replace view public.marketing_activities_with_manager
+with (security_invoker = true)
+as
+  select a.*, p.manager_id as marketer_manager_id
+  from public.marketing_activities a
+  left join public.profiles p on p.id = a.marketer_id;
+
+-- --- FOLLOW-UP ATOMIK & MASSAL ---
+-- Dipanggil lewat db.add_followups_bulk() / db.add_followup(). Satu statement = satu transaksi:
+-- status aktivitas dan baris follow-up tersimpan bersama atau tidak sama sekali.
+-- p_followups: [{activity_id, marketer_id, marketer_username, notes, next_action, next_followup_date, interest_level, status_update}, ...]
+-- Entri tanpa notes hanya mengubah status; entri tanpa status_update hanya menambah follow-up.
+-- Hasil memuat marketer_id dan manager_id pemilik tiap aktivitas, untuk invalidasi cache tanpa query profil tambahan.
+create or replace function public.add_followups(p_followups jsonb)
+returns json
+language sql
+as $$
+  with items as (
+    select *
+    from jsonb_to_recordset(p_followups) as x(activity_id bigint, marketer_id uuid, marketer_username text, notes text,
+                                              next_action text, next_followup_date date, interest_level text, status_update text)
+  ), updated as (
+    update public.marketing_activities a
+    set status = i.status_update
+    from items i
+    where a.id = i.activity_id and i.status_update is not null
+    returning a.id
+  ), inserted as (
+    insert into public.followups (activity_id, marketer_id, marketer_username, notes, next_action, next_followup_date, interest_level)
+    select activity_id, marketer_id, marketer_username, notes, next_action, next_followup_date, interest_level
+    from items
+    where notes is not null and notes <> ''
+    returning id
+  )
+  select json_build_object(
+    'activities', coalesce((select json_agg(json_build_object('id', a.id, 'marketer_id', a.marketer_id, 'manager_id', p.manager_id))
+                            from public.marketing_activities a left join public.profiles p on p.id = a.marketer_id
+                            where a.id in (select activity_id from items)), '[]'::json),
+    'statuses_updated', (select count(*) from updated),
+    'followups_added', (select count(*) from inserted)
+  );
+$$;
@@ -0,0 +1,53 @@
+# --- START OF FILE tests/test_activity_filters.py ---
+
+from datetime import date
+import pytest
+import db_supabase as db
+from benchmarks.fake_supabase import FakeSupabaseClient
+
+PROFILES = [{"id": "mgr", "role": "manager", "manager_id": None}, {"id": "m1", "role": "marketer", "manager_id": "mgr"}, {"id": "m2", "role": "marketer", "manager_id": None}]
+# (nama prospek, marketer, status, jenis, tanggal)
+ACTIVITIES = [("Diskon 50%", "m1", "baru", "Email", "2025-01-05"), ("Order 500 unit", "m1", "baru", "Email", "2025-01-06"),
+              ("kode a_b", "m1", "gagal", "Meeting", "2025-01-07"), ("kode axb", "m1", "gagal", "Meeting", "2025-01-08"),
+              ("PT A, B", "m2", "berhasil", "Presentasi", "2025-02-01"), ("PT A", "m2", "berhasil", "Presentasi", "2025-02-02"),
+              ('Toko "Maju"', "m2", "dalam_proses", "Demo Produk", "2025-02-03"), ("Toko Maju", "m2", "dalam_proses", "Demo Produk", "2025-02-04"),
+              ("C:\\data (lama)", "m1", "baru", "Lainnya", "2025-03-01"), ("C:data (lama)", "m1", "baru", "Lainnya", "2025-03-02")]
+
+@pytest.fixture
+def client(monkeypatch):
+    rows = [{"id": i + 1, "created_at": f"2025-04-01T00:00:{i:02d}+00:00", "prospect_name": name, "prospect_location": "", "contact_person": "", "marketer_id": marketer,
+             "status": status, "activity_type": activity_type, "activity_date": activity_date} for i, (name, marketer, status, activity_type, activity_date) in enumerate(ACTIVITIES)]
+    fake = FakeSupabaseClient({"profiles": PROFILES, "marketing_activities": rows, "followups": []})
+    monkeypatch.setattr(db, "init_connection", lambda: fake)
+    return fake
+
+def _names(role="superadmin", user_id=None, **filters):
+    rows, _ = db.get_marketing_activities_page(role, user_id, page_size=100, filters=filters)
+    return sorted(row['prospect_name'] for row in rows)
+
+def test_ilike_contains_escapes_wildcards_and_quotes_the_value():
+    assert db._ilike_contains("abc") == '"%abc%"'
+    assert db._ilike_contains("50%") == '"%50\\\\%%"'
+    assert db._ilike_contains("a_b") == '"%a\\\\_b%"'
+    assert db._ilike_contains('a,"b"') == '"%a,\\"b\\"%"'
+    assert db._ilike_contains("C:\\x") == '"%C:\\\\\\\\x%"'
+
+@pytest.mark.parametrize("term, expected", [("50%", ["Diskon 50%"]), ("a_b", ["kode a_b"]), ("PT A, B", ["PT A, B"]), ('"Maju"', ['Toko "Maju"']),
+                                            ("C:\\data", ["C:\\data (lama)"]), ("(lama)", ["C:\\data (lama)", "C:data (lama)"]), ("toko", ['Toko "Maju"', "Toko Maju"])])
+def test_search_matches_special_characters_literally(client, term, expected):
+    assert _names(search=term) == expected
+
+def test_search_is_one_round_trip(client):
+    _names(search="PT A, B")
+    assert len(client.round_trips) == 1
+
+def test_structured_filters_are_combined(client):
+    assert _names(statuses=["baru", "gagal"], activity_types=["Email"]) == ["Diskon 50%", "Order 500 unit"]
+    assert _names(marketer_id="m2", date_from=date(2025, 2, 2), date_to="2025-02-03") == ["PT A", 'Toko "Maju"']
+    assert _names(search="   ") == _names()
+
+def test_search_combines_with_manager_scope(client):
+    # Cakupan tim manajer juga memakai or=(); keduanya harus berlaku bersamaan
+    assert _names("manager", "mgr", search="kode") == ["kode a_b", "kode axb"]
+    assert _names("manager", "mgr", search="PT A") == []
+    assert _names("marketer", "m2", search="Maju", statuses=["dalam_proses"]) == ['Toko "Maju"', "Toko Maju"]
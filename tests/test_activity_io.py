@@ -0,0 +1,41 @@
+# --- START OF FILE tests/test_activity_io.py ---
+
+import io
+import activity_io
+
+HEADER = "prospect_name,activity_date,activity_type,status,description"
+
+def _parse(*lines): return activity_io.parse_activity_csv(io.StringIO("\n".join((HEADER,) + lines) + "\n"), "m1", "marketer1")
+
+def test_valid_rows_are_ready_to_insert():
+    records, errors = _parse("PT Maju,2025-03-01,Email,berhasil,Kirim penawaran", " CV Jaya ,2025-03-02,Meeting,Dalam Proses,")
+    assert errors == []
+    assert [r['prospect_name'] for r in records] == ["PT Maju", "CV Jaya"]
+    assert {k: records[0][k] for k in ("marketer_id", "marketer_username", "activity_date", "activity_type", "status")} == {"marketer_id": "m1", "marketer_username": "marketer1", "activity_date": "2025-03-01", "activity_type": "Email", "status": "berhasil"}
+    assert set(records[0]) == set(activity_io.IMPORT_COLUMNS) | {"marketer_id", "marketer_username"}
+    assert records[1]['prospect_location'] == ""
+
+def test_status_matches_key_or_label_case_insensitively():
+    records, errors = _parse(*(f"PT {i},2025-03-01,Email,{status}," for i, status in enumerate(["dalam_proses", "Dalam Proses", "GAGAL", "baru", ""])))
+    assert errors == []
+    assert [r['status'] for r in records] == ["dalam_proses", "dalam_proses", "gagal", "baru", "baru"]
+
+def test_empty_activity_type_uses_first_type():
+    records, _ = _parse("PT Maju,2025-03-01,,baru,")
+    assert records[0]['activity_type'] == activity_io.ACTIVITY_TYPES[0]
+
+def test_invalid_rows_are_reported_with_csv_line_numbers():
+    # Baris 1 adalah header, jadi baris data pertama bernomor 2
+    records, errors = _parse("PT Maju,2025-03-01,Email,baru,", ",2025-03-01,Email,baru,", "PT Salah,01/03/2025,Rapat,selesai,", "PT Oke,2025-03-04,Demo Produk,Berhasil,")
+    assert [r['prospect_name'] for r in records] == ["PT Maju", "PT Oke"]
+    assert [line for line, _ in errors] == [3, 4, 4, 4]
+    assert errors[0][1] == "Nama prospek wajib diisi"
+    assert {message.split(" ")[0] for _, message in errors[1:]} == {"Tanggal", "Jenis", "Status"}
+
+def test_missing_required_column_is_reported_on_header_line():
+    records, errors = activity_io.parse_activity_csv(io.StringIO("prospect_name,status\nPT Maju,baru\n"), "m1", "marketer1")
+    assert records == [] and errors == [(1, "Kolom wajib tidak ada: activity_date")]
+
+def test_unreadable_file_is_reported_without_line_number():
+    records, errors = activity_io.parse_activity_csv(io.StringIO(""), "m1", "marketer1")
+    assert records == [] and errors[0][0] == 0
@@ -0,0 +1,31 @@
+# --- START OF FILE tests/test_activity_store.py ---
+
+import pandas as pd
+import activity_store
+
+def _rows(*stamps): return [{"id": i + 1, "created_at": stamp, "updated_at": stamp, "status": "baru", "activity_type": "Email", "activity_date": "2025-01-01"} for i, stamp in enumerate(stamps)]
+
+def test_normalize_parses_timestamps_with_and_without_fraction():
+    # Postgres tidak menulis pecahan detik bila mikrodetiknya 0; kedua bentuk harus terbaca dalam satu frame
+    df = activity_store.normalize_activities(_rows("2025-01-01T10:00:00+00:00", "2025-01-01T10:00:00.123456+00:00", "2025-01-02T03:04:05Z"))
+    assert df['created_at'].notna().all() and df['updated_at'].notna().all()
+    assert df['created_at'].iloc[1] == pd.Timestamp("2025-01-01T10:00:00.123456Z")
+    assert df['created_at_display'].tolist() == ["01 Jan 2025, 17:00", "01 Jan 2025, 17:00", "02 Jan 2025, 10:04"]
+
+def test_watermark_and_merge_with_mixed_timestamp_shapes():
+    df = activity_store.normalize_activities(_rows("2025-01-01T10:00:00.5+00:00", "2025-01-01T09:00:00+00:00"))
+    delta = activity_store.normalize_activities([{**_rows("2025-01-03T08:00:00+00:00")[0], "id": 3}])
+    merged = activity_store._merge(df, delta)
+    assert merged['id'].tolist() == [3, 1, 2]
+    assert activity_store._watermark(merged) == "2025-01-03T08:00:00+00:00"
+
+def test_followups_watermark_with_mixed_timestamp_shapes():
+    followups = [{"created_at": "2025-01-01T10:00:00+00:00"}, {"created_at": "2025-01-01T10:00:00.250000+00:00"}]
+    assert activity_store._followups_watermark(None, followups) == "2025-01-01T10:00:00.250000+00:00"
+
+def test_delta_since_overlaps_the_watermark():
+    # Baris dari transaksi yang dimulai sebelum watermark tetapi di-commit sesudahnya harus ikut terambil
+    assert activity_store._delta_since(None) is None
+    assert activity_store._delta_since("2025-01-01T10:00:30.5+00:00") == "2025-01-01T09:59:30.500000+00:00"
+    df = activity_store.normalize_activities(_rows("2025-01-01T10:00:00+00:00"))
+    assert activity_store._merge(df, activity_store.normalize_activities(_rows("2025-01-01T10:00:00+00:00")))['id'].tolist() == [1]